@@ -1,63 +1,257 @@
+import asyncio
+import json
 import logging
-from anthropic import AsyncAnthropic, Anthropic
+import re
+import statistics
+import time
+from collections import deque
 from config import Config
+from utils.resilience import call_with_resilience
+from utils.log_setup import capped
 
 """
 Interface module for the Claude AI API integration.
 Handles communication with Claude AI for analyzing financial documents and reports.
 Provides functionality to process and analyze text content with specific financial metrics.
+Analyses are routed by tier: a fast model triages the filing first, answers short or
+simple filings on its own, and only the questions that need deep reasoning on a
+complex filing (convertible notes, share structure, valuation) go to the large model.
 
 """
 
 logger = logging.getLogger(__name__)
 
-async def analyze_with_claude(ticker, text_content, previous_close_price):
-    logger.debug(f"Starting analysis with Claude for ticker: {ticker}")
-    
-    questions = [
-        "In what industry is it? (Block chain, real estate, mining, etc..)",
-        "Is it a shell company? If yes, what are the plans for this shell?",
-        "What is the amount of the convertible notes the company has? (in $)",
-        "When are the convertible notes due? Please elaborate on each convertible note mentioned in the document, including its due date",
-        "Have there been any changes to the share structure between the quarters, such as share dilution or a decrease in the number of shares?",
-        "Did they settle them (the convertible notes) or do they have plans to settle or do something with it?",
-        "Are there any future plans for the business?",
-        "Are there any upcoming material events disclosed or hinted at in the document, such as potential acquisitions, mergers, or significant changes in the share structure?",
-        "Are there any plans for reverse split in the future?",
-        f"What is the ratio of total assets to market capitalization (total market cap) for the company, based on the information provided in the document? Use the previous close price of ${previous_close_price} to calculate the market cap.",
-    ]
-    
-    prompt = f"""Analyze the following document thoroughly for {ticker}, including any tables or structured data. Then answer these questions:
+DOCUMENT_CHARS = 100000
+TRIAGE_CHARS = 12000
 
-{chr(10).join(f"{i+1}. {q}" for i, q in enumerate(questions))}
+# Topics whose questions go to the deep tier when the triage finds them in a long filing
+DEEP_TOPICS = ("notes", "share_structure", "valuation")
 
-Document content:
-{text_content[:100000]}  # Limit to first 100,000 characters to avoid token limits
+# Line the models put between answers when a reply has to be merged with the other tier's
+ANSWER_SEPARATOR = "----"
+ANSWER_SEPARATOR_PATTERN = re.compile(r"^\s*-{4,}\s*$", re.M)
 
-Start your reply with "Here is the analysis for {ticker}:" Provide your answers in a clear, concise manner but not as you are answering a question but as if you are stating a fact. Do not include question numbers or prefixes in your responses.
+NOTES_PATTERN = re.compile(r"convertible\s+(promissory\s+)?notes?", re.I)
+SHARE_STRUCTURE_PATTERN = re.compile(r"reverse\s+(stock\s+)?split|shares\s+(were\s+)?issued|increase\s+in\s+(the\s+number\s+of\s+)?authorized", re.I)
+
+TRIAGE_PROMPT = """You are triaging an OTC company filing before it is analyzed. Reply with only a JSON object with these keys:
+"filing_type" (e.g. "10-K", "10-Q", "8-K", "annual report", "quarterly report", "other"),
+"has_convertible_notes" (true/false), "has_share_structure_changes" (true/false),
+"has_financial_statements" (true/false), "complexity" ("low", "medium" or "high").
+
+Filing excerpt:
+{excerpt}
 """
 
+
+def build_questions(previous_close_price):
+    """(topic, question) pairs in the order answers should appear"""
+    return [
+        ("profile", "In what industry is it? (Block chain, real estate, mining, etc..)"),
+        ("profile", "Is it a shell company? If yes, what are the plans for this shell?"),
+        ("notes", "What is the amount of the convertible notes the company has? (in $)"),
+        ("notes", "When are the convertible notes due? Please elaborate on each convertible note mentioned in the document, including its due date"),
+        ("share_structure", "Have there been any changes to the share structure between the quarters, such as share dilution or a decrease in the number of shares?"),
+        ("notes", "Did they settle them (the convertible notes) or do they have plans to settle or do something with it?"),
+        ("profile", "Are there any future plans for the business?"),
+        ("profile", "Are there any upcoming material events disclosed or hinted at in the document, such as potential acquisitions, mergers, or significant changes in the share structure?"),
+        ("profile", "Are there any plans for reverse split in the future?"),
+        ("valuation", f"What is the ratio of total assets to market capitalization (total market cap) for the company, based on the information provided in the document? Use the previous close price of ${previous_close_price} to calculate the market cap."),
+    ]
+
+
+class RoutingStats:
+    """Recent routing decisions and per-tier call latencies"""
+
+    def __init__(self, maxlen=500):
+        self.decisions = deque(maxlen=maxlen)
+        self.latencies = {"triage": deque(maxlen=maxlen), "fast": deque(maxlen=maxlen), "deep": deque(maxlen=maxlen)}
+
+    def record_latency(self, tier, seconds):
+        self.latencies[tier].append(seconds)
+
+    def record_decision(self, ticker, triage, deep_topics, total_seconds):
+        self.decisions.append({
+            "ticker": ticker,
+            "filing_type": triage.get("filing_type"),
+            "deep_topics": deep_topics,
+            "total_seconds": total_seconds,
+        })
+
+    def summary(self):
+        routed_deep = sum(1 for decision in self.decisions if decision["deep_topics"])
+        summary = {
+            "analyses": len(self.decisions),
+            "fast_only": len(self.decisions) - routed_deep,
+            "used_deep": routed_deep,
+        }
+        if self.decisions:
+            summary["median_total_s"] = statistics.median(d["total_seconds"] for d in self.decisions)
+        for tier, values in self.latencies.items():
+            if values:
+                summary[f"median_{tier}_s"] = statistics.median(values)
+        return summary
+
+
+routing_stats = RoutingStats()
+
+
+def is_transient_error(exc):
+    import anthropic
+    return isinstance(exc, (anthropic.APIConnectionError, anthropic.APITimeoutError, anthropic.RateLimitError, anthropic.InternalServerError))
+
+
+def _response_text(response):
+    if hasattr(response, 'content') and isinstance(response.content, list):
+        for content_item in response.content:
+            if hasattr(content_item, 'text'):
+                return content_item.text
+    logger.error("Unexpected response format from Claude API: %s", capped(response))
+    return None
+
+
+async def _complete(client, tier, model, prompt, max_tokens):
+    started = time.perf_counter()
     try:
-        async with AsyncAnthropic(api_key=Config.ANTHROPIC_API_KEY) as client:
-            response = await client.messages.create(
-                model="claude-3-opus-20240229",
-                max_tokens=4000,
+        response = await call_with_resilience(
+            f"claude.{tier}",
+            lambda: client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
                 messages=[
                     {"role": "user", "content": prompt}
                 ]
-            )
-        
-        logger.debug(f"Raw response from Claude: {response}")
-        
-        if hasattr(response, 'content') and isinstance(response.content, list):
-            for content_item in response.content:
-                if hasattr(content_item, 'text'):
-                    logger.info(f"Successfully parsed Claude API response for {ticker}")
-                    return content_item.text
-        
-        logger.error(f"Unexpected response format from Claude API: {response}")
-        return None
+            ),
+            attempts=2,
+            is_transient=is_transient_error,
+        )
+    finally:
+        routing_stats.record_latency(tier, time.perf_counter() - started)
+    logger.debug("Raw %s response from Claude: %s", tier, capped(response))
+    return _response_text(response)
 
+
+async def triage_filing(client, text_content):
+    """
+    Classify the filing with the fast model. Keyword matches over the whole text back
+    up the model, which only sees an excerpt. A failed triage routes everything deep.
+    """
+    triage = {
+        "filing_type": "unknown",
+        "has_convertible_notes": bool(NOTES_PATTERN.search(text_content)),
+        "has_share_structure_changes": bool(SHARE_STRUCTURE_PATTERN.search(text_content)),
+        "has_financial_statements": True,
+        "complexity": "high",
+    }
+    try:
+        reply = await _complete(client, "triage", Config.CLAUDE_FAST_MODEL, TRIAGE_PROMPT.format(excerpt=text_content[:TRIAGE_CHARS]), 300)
+        match = re.search(r"\{.*\}", reply or "", re.S)
+        if not match:
+            raise ValueError("no JSON object in triage reply")
+        result = json.loads(match.group(0))
     except Exception as e:
-        logger.exception(f"Error calling Claude API for {ticker}: {str(e)}")
-        return None
\ No newline at end of file
+        logger.warning("Filing triage failed, routing every question to the deep tier: %s", e)
+        return triage
+
+    triage["filing_type"] = result.get("filing_type", "unknown")
+    triage["has_convertible_notes"] = triage["has_convertible_notes"] or bool(result.get("has_convertible_notes"))
+    triage["has_share_structure_changes"] = triage["has_share_structure_changes"] or bool(result.get("has_share_structure_changes"))
+    # Flags the model left out count as absent once triage itself succeeded
+    triage["has_financial_statements"] = bool(result.get("has_financial_statements", False))
+    triage["complexity"] = result.get("complexity", "medium")
+    return triage
+
+
+def route_topics(triage, text_length):
+    """Topics that need the deep model; an empty list means the fast tier answers everything"""
+    if text_length <= Config.ANALYSIS_SHORT_CHARS or triage["complexity"] == "low":
+        # Short filings, and long ones the triage found simple, stay on the fast tier
+        return []
+    present = {
+        "notes": triage["has_convertible_notes"],
+        "share_structure": triage["has_share_structure_changes"],
+        "valuation": triage["has_financial_statements"],
+    }
+    return [topic for topic in DEEP_TOPICS if present[topic]]
+
+
+def build_prompt(ticker, questions, text_content, with_header, separated=False):
+    opening = f'Start your reply with "Here is the analysis for {ticker}:" ' if with_header else "Do not add a title or introduction. "
+    separation = f"Answer the questions in order and put a line containing only {ANSWER_SEPARATOR} between consecutive answers. " if separated else ""
+    return f"""Analyze the following document thoroughly for {ticker}, including any tables or structured data. Then answer these questions:
+
+{chr(10).join(f"{i+1}. {q}" for i, q in enumerate(questions))}
+
+Document content:
+{text_content[:DOCUMENT_CHARS]}
+
+{opening}{separation}Provide your answers in a clear, concise manner but not as you are answering a question but as if you are stating a fact. Do not include question numbers or prefixes in your responses.
+"""
+
+
+def merge_answers(ticker, questions, deep_topics, fast_reply, deep_reply):
+    """
+    Put the two tiers' answers back into question order. Falls back to fast then deep
+    when a reply does not split into one answer per question.
+    """
+    fast_answers = [part.strip() for part in ANSWER_SEPARATOR_PATTERN.split(fast_reply) if part.strip()]
+    deep_answers = [part.strip() for part in ANSWER_SEPARATOR_PATTERN.split(deep_reply) if part.strip()]
+    deep_count = sum(1 for topic, _ in questions if topic in deep_topics)
+    if len(deep_answers) != deep_count or len(fast_answers) != len(questions) - deep_count:
+        logger.warning(
+            "Could not split answers for %s (%s fast, %s deep), keeping tier order",
+            ticker, len(fast_answers), len(deep_answers),
+        )
+        ordered = fast_answers + deep_answers
+    else:
+        fast_iter, deep_iter = iter(fast_answers), iter(deep_answers)
+        ordered = [next(deep_iter) if topic in deep_topics else next(fast_iter) for topic, _ in questions]
+    return f"Here is the analysis for {ticker}:\n\n" + "\n\n".join(ordered)
+
+
+async def analyze_with_claude(ticker, text_content, previous_close_price):
+    logger.debug("Starting analysis with Claude for ticker: %s", ticker)
+
+    # Imported lazily: most updates never reach the analysis path
+    from anthropic import AsyncAnthropic
+
+    started = time.perf_counter()
+    questions = build_questions(previous_close_price)
+
+    try:
+        async with AsyncAnthropic(api_key=Config.ANTHROPIC_API_KEY, max_retries=0) as client:
+            if len(text_content) <= Config.ANALYSIS_SHORT_CHARS:
+                # Short filings go straight to the fast tier; a triage call would only add latency
+                triage = {"filing_type": "short", "complexity": "low"}
+            else:
+                triage = await triage_filing(client, text_content)
+            deep_topics = route_topics(triage, len(text_content))
+            fast_questions = [question for topic, question in questions if topic not in deep_topics]
+            deep_questions = [question for topic, question in questions if topic in deep_topics]
+
+            if fast_questions and deep_questions:
+                fast_reply, deep_reply = await asyncio.gather(
+                    _complete(client, "fast", Config.CLAUDE_FAST_MODEL, build_prompt(ticker, fast_questions, text_content, False, True), 2000),
+                    _complete(client, "deep", Config.CLAUDE_DEEP_MODEL, build_prompt(ticker, deep_questions, text_content, False, True), 4000),
+                )
+                answer = merge_answers(ticker, questions, deep_topics, fast_reply, deep_reply) if fast_reply and deep_reply else None
+            elif deep_questions:
+                answer = await _complete(client, "deep", Config.CLAUDE_DEEP_MODEL, build_prompt(ticker, deep_questions, text_content, True), 4000)
+            else:
+                answer = await _complete(client, "fast", Config.CLAUDE_FAST_MODEL, build_prompt(ticker, fast_questions, text_content, True), 2000)
+
+        total = time.perf_counter() - started
+        routing_stats.record_decision(ticker, triage, deep_topics, total)
+        logger.info(
+            "Routed %s (%s, %s chars): %s fast, %s deep questions %s in %.1fs",
+            ticker, triage["filing_type"], len(text_content), len(fast_questions), len(deep_questions), deep_topics, total,
+        )
+
+        if not answer:
+            return None
+        logger.info("Successfully parsed Claude API response for %s", ticker)
+        return answer
+
+    except Exception as e:
+        logger.exception("Error calling Claude API for %s: %s", ticker, e)
+        return None
@@ -0,0 +1,85 @@
+import aiohttp
+import json
+import logging
+from config import Config
+
+"""
+Message batches API client module.
+Talks to the asynchronous message batches endpoint over plain aiohttp so the base URL
+can point at a local fake during testing. Batches are created in one request, polled
+by id, and their JSONL results are streamed line by line.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+API_VERSION = "2023-06-01"
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=60)
+
+
+class BatchAPIError(Exception):
+    """Raised when the batches endpoint returns an error response"""
+
+
+class MessageBatchClient:
+    def __init__(self, base_url=None, api_key=None):
+        self.base_url = (base_url or Config.ANTHROPIC_BASE_URL).rstrip("/")
+        self.api_key = api_key or Config.ANTHROPIC_API_KEY
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={
+                    "x-api-key": self.api_key,
+                    "anthropic-version": API_VERSION,
+                    "content-type": "application/json",
+                },
+                timeout=REQUEST_TIMEOUT,
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request(self, method, path, **kwargs):
+        async with self._get_session().request(method, f"{self.base_url}{path}", **kwargs) as response:
+            if response.status >= 400:
+                raise BatchAPIError(f"{method} {path} failed with {response.status}: {await response.text()}")
+            return await response.json()
+
+    async def create(self, requests):
+        """requests: list of {"custom_id": ..., "params": {model, max_tokens, messages}}"""
+        return await self._request("POST", "/v1/messages/batches", json={"requests": requests})
+
+    async def retrieve(self, batch_id):
+        return await self._request("GET", f"/v1/messages/batches/{batch_id}")
+
+    async def results(self, batch):
+        """
+        Read an ended batch's results. Returns {custom_id: (text, error)} where exactly one
+        of text and error is set.
+        """
+        url = batch.get("results_url") or f"{self.base_url}/v1/messages/batches/{batch['id']}/results"
+        results = {}
+        async with self._get_session().get(url, timeout=aiohttp.ClientTimeout(total=None, sock_read=60)) as response:
+            if response.status >= 400:
+                raise BatchAPIError(f"Fetching results for {batch['id']} failed with {response.status}")
+            async for line in response.content:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                result = entry.get("result", {})
+                if result.get("type") == "succeeded":
+                    blocks = result.get("message", {}).get("content", [])
+                    text = "".join(block.get("text", "") for block in blocks if block.get("type") == "text")
+                    results[entry["custom_id"]] = (text, None)
+                else:
+                    error = result.get("error", {}).get("message") or result.get("type", "unknown")
+                    results[entry["custom_id"]] = (None, error)
+        return results
+
+
+message_batch_client = MessageBatchClient()
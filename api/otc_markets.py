@@ -1,68 +1,148 @@
 import aiohttp
+import asyncio
+import csv
+import io
 import logging
+from collections import OrderedDict
 from utils.rate_limiter import rate_limited_request
+from utils.resilience import call_with_resilience
 
 """
 OTC Markets API client module.
 Handles all interactions with the OTC Markets API, including fetching company profiles,
 trade data, and news. Implements rate limiting and error handling for API requests.
+Requests are sent over a shared session with gzip/brotli negotiation, and ETag /
+Last-Modified validators are kept per URL so unchanged payloads come back as cheap
+304 responses served from the decoded copy kept in memory. Every GET runs behind a
+per-endpoint circuit breaker with jittered retries and hedging.
 
 """
 
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://backend.otcmarkets.com/otcapi"
+SYMBOL_LIST_URL = "https://www.otcmarkets.com/research/stock-screener/api/downloadCSV"
+
+HEADERS = {
+    "Host": "backend.otcmarkets.com",
+    "Origin": "https://www.otcmarkets.com",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Connection": "keep-alive",
+    "Referer": "https://www.otcmarkets.com/",
+}
+
+MAX_VALIDATOR_ENTRIES = 4096
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+# (url, params) -> (etag, last_modified, decoded body), least recently used first
+_validators = OrderedDict()
+_session = None
+
+def get_session():
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(headers=HEADERS, timeout=REQUEST_TIMEOUT)
+    return _session
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+def _cache_key(url, params):
+    return (url, tuple(sorted(params.items())) if params else ())
+
+def is_transient_error(exc):
+    """Timeouts, connection problems, 429 and 5xx are worth retrying; other 4xx are not"""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status == 429 or exc.status >= 500
+    return isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError))
+
+def _remember(key, response, body):
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not etag and not last_modified:
+        _validators.pop(key, None)
+        return
+    _validators[key] = (etag, last_modified, body)
+    _validators.move_to_end(key)
+    while len(_validators) > MAX_VALIDATOR_ENTRIES:
+        _validators.popitem(last=False)
 
 async def get_profile_data(ticker):
     url = f"{BASE_URL}/company/profile/full/{ticker}"
-    headers = {
-        "Host": "backend.otcmarkets.com",
-        "Origin": "https://www.otcmarkets.com",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36",
-        "Accept": "application/json, text/plain, */*",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Connection": "keep-alive",
-        "Referer": "https://www.otcmarkets.com/",
-    }
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
-            response.raise_for_status()
-            return await response.json()
+    return await fetch_data(url, endpoint="otc.profile")
 
 async def get_trade_data(ticker):
     url = f"{BASE_URL}/stock/trade/inside/{ticker}"
-    return await fetch_data(url)
+    return await fetch_data(url, endpoint="otc.trade")
 
-async def get_news_data(ticker):
+async def get_news_data(ticker, page=1, page_size=5):
     url = f"{BASE_URL}/company/{ticker}/dns/news"
     params = {
-        "page": 1,
-        "pageSize": 5,
+        "page": page,
+        "pageSize": page_size,
         "sortOn": "releaseDate",
         "sortDir": "DESC"
     }
     try:
-        return await fetch_data(url, params=params)
+        return await fetch_data(url, params=params, endpoint="otc.news")
     except aiohttp.ContentTypeError:
-        logger.warning(f"No news data available for {ticker}")
+        logger.warning("No news data available for %s", ticker)
         return []  # Return an empty list instead of raising an exception
 
-async def fetch_data(url, params=None):
-    headers = {
-        "Host": "backend.otcmarkets.com",
-        "Origin": "https://www.otcmarkets.com",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36",
-        "Accept": "application/json, text/plain, */*",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Connection": "keep-alive",
-        "Referer": "https://www.otcmarkets.com/",
-    }
+async def get_symbol_list():
+    """Download the full OTC security list and return its symbols"""
+    headers = {"Host": "www.otcmarkets.com", "Accept": "text/csv, */*"}
 
-    try:
-        async with aiohttp.ClientSession() as session:
-            response = await rate_limited_request(session.get, url, headers=headers, params=params)
+    async def fetch():
+        session = get_session()
+        response = await rate_limited_request(session.get, SYMBOL_LIST_URL, headers=headers)
+        async with response:
             response.raise_for_status()
-            return await response.json()
-    except aiohttp.ClientError as e:
-        logger.error(f"Error fetching data from {url}: {str(e)}")
-        raise
\ No newline at end of file
+            return await response.text()
+
+    text = await call_with_resilience("otc.symbols", fetch, is_transient=is_transient_error)
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, [])
+    column = header.index("Symbol") if "Symbol" in header else 0
+    return [row[column].strip().upper() for row in reader if len(row) > column and row[column].strip()]
+
+async def fetch_data(url, params=None, endpoint="otc"):
+    try:
+        return await call_with_resilience(
+            endpoint,
+            lambda: _fetch_once(url, params),
+            hedge=True,
+            is_transient=is_transient_error,
+        )
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error("Error fetching data from %s: %s", url, e)
+        raise
+
+async def _fetch_once(url, params=None):
+    key = _cache_key(url, params)
+    cached = _validators.get(key)
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    session = get_session()
+    response = await rate_limited_request(session.get, url, headers=headers, params=params)
+    async with response:
+        if response.status == 304 and cached:
+            logger.debug("Not modified, serving cached body for %s", url)
+            _validators.move_to_end(key)
+            return cached[2]
+        response.raise_for_status()
+        body = await response.json()
+        _remember(key, response, body)
+        return body
@@ -1,7 +1,7 @@
 import logging
 from telegram.constants import ParseMode
-from scrapfly import ScrapeConfig, ScrapflyClient
 from config import Config
+from utils.resilience import call_with_resilience
 from datetime import datetime
 import json
 
@@ -14,24 +14,38 @@ handling the extraction and processing of tweet data for financial analysis.
 
 logger = logging.getLogger(__name__)
 
-SCRAPFLY = ScrapflyClient(key=Config.SCRAPFLY_API_KEY)
+_client = None
+
+def get_client():
+    """Create the Scrapfly client on first use instead of at import time"""
+    global _client
+    if _client is None:
+        from scrapfly import ScrapflyClient
+        _client = ScrapflyClient(key=Config.SCRAPFLY_API_KEY)
+    return _client
 
 async def scrape_tweets(url: str) -> list:
     """
     Scrape the latest tweets from an X.com profile, ensuring multiple tweets per date are captured
     """
-    result = await SCRAPFLY.async_scrape(ScrapeConfig(
-        url, 
-        render_js=True,
-        wait_for_selector="[data-testid='tweet']"
-    ))
+    from scrapfly import ScrapeConfig
+
+    result = await call_with_resilience(
+        "scrapfly",
+        lambda: get_client().async_scrape(ScrapeConfig(
+            url, 
+            render_js=True,
+            wait_for_selector="[data-testid='tweet']"
+        )),
+        attempts=2,
+    )
     
-    print(f"Scrapfly response status: {result.status_code}")
+    logger.debug("Scrapfly response status: %s", result.status_code)
     
     _xhr_calls = result.scrape_result["browser_data"]["xhr_call"]
     tweet_calls = [f for f in _xhr_calls if "UserTweets" in f["url"]]
     
-    print(f"Found {len(tweet_calls)} UserTweets XHR calls")
+    logger.debug("Found %s UserTweets XHR calls", len(tweet_calls))
     
     all_tweets = []
     for xhr in tweet_calls:
@@ -62,9 +76,8 @@ async def scrape_tweets(url: str) -> list:
                                                     'retweet_count': legacy.get('retweet_count', 0),
                                                     'favorite_count': legacy.get('favorite_count', 0)
                                                 })
-                                                print(f"Extracted tweet from {created_at}")
         except Exception as e:
-            print(f"Error processing tweet data: {str(e)}")
+            logger.warning("Error processing tweet data: %s", e)
     
     # Sort tweets by created_at in descending order (most recent first)
     all_tweets.sort(key=lambda x: x['created_at'], reverse=True)
@@ -73,5 +86,5 @@ async def scrape_tweets(url: str) -> list:
     for tweet in all_tweets:
         tweet['created_at'] = tweet['created_at'].strftime('%Y-%m-%d %H:%M:%S')
     
-    print(f"Extracted and sorted {len(all_tweets)} tweets")
+    logger.info("Extracted and sorted %s tweets", len(all_tweets))
     return all_tweets  # Return all tweets without limiting
\ No newline at end of file
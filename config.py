@@ -9,7 +9,6 @@ and other configuration values used throughout the application.
 
 class Config:
     TELEGRAM_TOKEN = os.environ.get("TELEGRAM_TOKEN", "DEFAULT_TOKEN_NOT_SET")
-    print(f"Config: TELEGRAM_TOKEN = {TELEGRAM_TOKEN}")
     GOOGLE_APPLICATION_CREDENTIALS = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "DEFAULT_TOKEN_NOT_SET")
     WATCHLIST_SHEET_ID = "1EWVVCYC5EbYzx3jIFhwthdTJxyNvWdz57kzX-DRwwn0"
     ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "DEFAULT_TOKEN_NOT_SET")
@@ -18,3 +17,87 @@ class Config:
     SCRAPFLY_API_KEY =  os.environ.get("SCRAPFLY", "DEFAULT_TOKEN_NOT_SET")
     OTC_MARKETS_BASE_URL = "https://www.otcmarkets.com/otcapi"
 
+    # Persistent warm-start cache tier
+    CACHE_SQLITE_PATH = os.environ.get("CACHE_SQLITE_PATH", "ticker_cache.db")
+    CACHE_FLUSH_INTERVAL = int(os.environ.get("CACHE_FLUSH_INTERVAL", "30"))
+    CACHE_WARM_MAX_AGE_HOURS = int(os.environ.get("CACHE_WARM_MAX_AGE_HOURS", "24"))
+    CACHE_MAX_PENDING = int(os.environ.get("CACHE_MAX_PENDING", "5000"))
+
+    # Shared state for multi-worker deployments (e.g. redis://...); unset keeps state in-process
+    SHARED_STATE_URL = os.environ.get("SHARED_STATE_URL") or os.environ.get("REDIS_URL")
+
+    # Local ticker symbol directory
+    SYMBOL_DIRECTORY_PATH = os.environ.get("SYMBOL_DIRECTORY_PATH", "symbols.txt")
+    SYMBOL_REFRESH_HOURS = int(os.environ.get("SYMBOL_REFRESH_HOURS", "12"))
+
+    # Watchlist change alerts
+    ALERT_POLL_MINUTES = int(os.environ.get("ALERT_POLL_MINUTES", "15"))
+
+    # Database pool
+    DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "5"))
+    DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", "256"))
+    ADMIN_USER_IDS = {int(user_id) for user_id in os.environ.get("ADMIN_USER_IDS", "").split(",") if user_id.strip()}
+
+    # News ingestion
+    NEWS_POLL_MINUTES = int(os.environ.get("NEWS_POLL_MINUTES", "20"))
+    # Live fetches for tickers with nothing stored yet, per worker
+    NEWS_LIVE_FETCHES_PER_MINUTE = int(os.environ.get("NEWS_LIVE_FETCHES_PER_MINUTE", "20"))
+
+    # Heavy job scheduling (Claude analyses, Scrapfly scrapes)
+    CLAUDE_CONCURRENCY = int(os.environ.get("CLAUDE_CONCURRENCY", "2"))
+    SCRAPFLY_CONCURRENCY = int(os.environ.get("SCRAPFLY_CONCURRENCY", "2"))
+    JOBS_PER_USER = int(os.environ.get("JOBS_PER_USER", "1"))
+    MAX_QUEUED_JOBS_PER_USER = int(os.environ.get("MAX_QUEUED_JOBS_PER_USER", "30"))
+    # Fair-share weights per Telegram user id, e.g. "12345=2,67890=0.5" (default 1)
+    JOB_USER_WEIGHTS = {
+        int(user_id): float(weight)
+        for user_id, _, weight in (item.partition("=") for item in os.environ.get("JOB_USER_WEIGHTS", "").split(","))
+        if user_id.strip() and weight
+    }
+
+    # Logging (LOG_SAMPLE_RATES is e.g. "handlers.info=0.1,api.otc_markets=0.25")
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "ERROR").upper()
+    LOG_JSON = os.environ.get("LOG_JSON", "").lower() in ("1", "true", "yes")
+    LOG_PAYLOAD_LIMIT = int(os.environ.get("LOG_PAYLOAD_LIMIT", "500"))
+    LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+    LOG_SAMPLE_RATES = {
+        name.strip(): float(rate)
+        for name, _, rate in (item.partition("=") for item in os.environ.get("LOG_SAMPLE_RATES", "").split(","))
+        if name.strip() and rate
+    }
+
+    # Filing text extraction: only relevant pages of long filings are extracted for analysis
+    PDF_SELECTIVE = os.environ.get("PDF_SELECTIVE", "true").lower() in ("1", "true", "yes")
+    PDF_TEXT_BUDGET = int(os.environ.get("PDF_TEXT_BUDGET", "100000"))
+    PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "40"))
+    PDF_FULL_EXTRACT_PAGES = int(os.environ.get("PDF_FULL_EXTRACT_PAGES", "8"))
+
+    # Filing downloads are streamed to a temp file that stays in memory up to FILING_SPOOL_BYTES
+    FILING_MAX_BYTES = int(os.environ.get("FILING_MAX_BYTES", str(50 * 1024 * 1024)))
+    FILING_SPOOL_BYTES = int(os.environ.get("FILING_SPOOL_BYTES", str(1024 * 1024)))
+    FILING_RESUME_ATTEMPTS = int(os.environ.get("FILING_RESUME_ATTEMPTS", "3"))
+
+    # Tiered analysis: a fast model triages every filing, the deep model only answers what needs it
+    CLAUDE_FAST_MODEL = os.environ.get("CLAUDE_FAST_MODEL", "claude-3-haiku-20240307")
+    CLAUDE_DEEP_MODEL = os.environ.get("CLAUDE_DEEP_MODEL", "claude-3-opus-20240229")
+    ANALYSIS_SHORT_CHARS = int(os.environ.get("ANALYSIS_SHORT_CHARS", "20000"))
+
+    # Bulk watchlist analysis through the message batches API (base URL overridable for a local fake)
+    ANTHROPIC_BASE_URL = os.environ.get("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
+    BATCH_POLL_SECONDS = int(os.environ.get("BATCH_POLL_SECONDS", "60"))
+    BATCH_PREP_CONCURRENCY = int(os.environ.get("BATCH_PREP_CONCURRENCY", "4"))
+
+    # Officer / contact / address index behind /related
+    RELATED_INDEX_PATH = os.environ.get("RELATED_INDEX_PATH", "related_index.json.gz")
+
+    # Nightly crawl of the full OTC universe into the persistent cache (one worker holds the crawl lease)
+    CRAWL_ENABLED = os.environ.get("CRAWL_ENABLED", "true").lower() in ("1", "true", "yes")
+    CRAWL_HOUR_UTC = int(os.environ.get("CRAWL_HOUR_UTC", "3"))
+    CRAWL_CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", "4"))
+    CRAWL_REQUESTS_PER_SECOND = float(os.environ.get("CRAWL_REQUESTS_PER_SECOND", "4"))
+    CRAWL_BATCH_SIZE = int(os.environ.get("CRAWL_BATCH_SIZE", "100"))
+    CRAWL_SKIP_FRESH_HOURS = int(os.environ.get("CRAWL_SKIP_FRESH_HOURS", "6"))
+    CRAWL_CHECKPOINT_PATH = os.environ.get("CRAWL_CHECKPOINT_PATH", "crawl_checkpoint.json")
+    # How old a cached snapshot may be and still answer /info immediately while it refreshes
+    CACHE_SERVE_MAX_AGE_HOURS = int(os.environ.get("CACHE_SERVE_MAX_AGE_HOURS", "24"))
@@ -0,0 +1,36 @@
+import logging
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+from config import Config
+from utils.data_access import db
+from api.claude import routing_stats
+from utils.job_scheduler import job_scheduler
+
+"""
+Administrative commands module.
+Exposes operational metrics such as database pool usage, analysis model routing and
+heavy job queueing to the users listed in ADMIN_USER_IDS.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+def is_admin(update: Update) -> bool:
+    return update.effective_user is not None and update.effective_user.id in Config.ADMIN_USER_IDS
+
+async def dbstats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not is_admin(update):
+        return
+
+    metrics = db.get_metrics()
+    lines = ["<b>🗄️ Database pool</b>\n"]
+    for key, value in metrics.items():
+        lines.append(f"{key}: {value:.1f}" if isinstance(value, float) else f"{key}: {value}")
+    lines.append("\n<b>🧠 Analysis routing</b>\n")
+    for key, value in routing_stats.summary().items():
+        lines.append(f"{key}: {value:.1f}" if isinstance(value, float) else f"{key}: {value}")
+    lines.append("\n<b>⏳ Job queue</b>\n")
+    for key, value in job_scheduler.summary().items():
+        lines.append(f"{key}: {value:.1f}" if isinstance(value, float) else f"{key}: {value}")
+    await update.message.reply_text("\n".join(lines), parse_mode=ParseMode.HTML)
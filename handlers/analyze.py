@@ -1,13 +1,17 @@
 import asyncio
-import aiohttp
 import logging
 from telegram import Update, Message
 from telegram.ext import ContextTypes
 from models.ticker_data import TickerData
 from utils.pdf_utils import extract_text_from_pdf
+from utils.filing_download import open_filing, FilingDownloadError
 from api.claude import analyze_with_claude
 from utils.parsing import parse_claude_response
 from utils.loading_animation import loading_animation
+from utils.message_sender import message_sender
+from utils.job_scheduler import job_scheduler, QueueFullError
+from utils.batch_analysis import batch_analyzer
+from utils.formatting import custom_escape_html
 
 """
 Document analysis module.
@@ -18,30 +22,82 @@ Claude AI integration, and formatting analysis results for Telegram messages.
 
 logger = logging.getLogger(__name__)
 
+# Relative cost units used for per-user accounting in the job scheduler
+ANALYSIS_COST = 10
+
 async def analyze_report_button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
     await query.answer()
     
     ticker = query.data.split('_')[-1]
-    ticker_data = TickerData.get(ticker)
+    ticker_data = await TickerData.aget(ticker)
     
     if not ticker_data:
         await query.message.reply_text(f"Sorry, some information is missing for {ticker}. Please fetch the ticker info again.")
         return
 
     loading_message = await query.message.reply_text(f"Fetching and analyzing the latest report for {ticker}...")
-    context.user_data['loading'] = True
-    loading_task = asyncio.create_task(loading_animation(loading_message, f"Analyzing report for {ticker}...", context))
-    
+
+    async def on_position(position):
+        await loading_message.edit_text(f"⏳ Analysis for {ticker} is queued (position {position})...")
+
+    async def job():
+        # Per-job flag: a user may have several jobs running, each with its own status message
+        done = asyncio.Event()
+        loading_task = asyncio.create_task(loading_animation(loading_message, f"Analyzing report for {ticker}...", done))
+        try:
+            await perform_analysis(loading_message, context, ticker, ticker_data)
+        except Exception as e:
+            logger.error("Error during analysis for %s: %s", ticker, e, exc_info=True)
+            await query.message.reply_text(f"An error occurred during the analysis for {ticker}. Please try again later.")
+        finally:
+            done.set()
+            await loading_task
+            await loading_message.delete()
+
+    # The scheduler owns the job; returning right away keeps this user's other updates flowing
+    try:
+        job_scheduler.submit(update.effective_user.id, "claude", job, cost=ANALYSIS_COST, on_position=on_position)
+    except QueueFullError:
+        await loading_message.edit_text("You already have too many analyses queued. Please wait for some to finish.")
+
+async def analyze_watchlist(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """/analyze_wl - analyze the latest filing of every watchlist ticker as one batch job"""
+    user_id = update.effective_user.id
+    chat_id = update.effective_chat.id
+
+    if not batch_analyzer.ready:
+        await update.message.reply_text("Bulk analysis is not available right now. Please try again later.")
+        return
+    if await batch_analyzer.db.get_pending_batches(user_id):
+        await update.message.reply_text("Your previous watchlist analysis is still running. The digest will arrive here when it is ready.")
+        return
+
+    status_message = await update.message.reply_text("Collecting the latest filings for your watchlist...")
+
+    async def job():
+        try:
+            summary = await batch_analyzer.submit_watchlist(context.bot, user_id, chat_id)
+        except Exception as e:
+            logger.error("Batch analysis submission failed for user %s: %s", user_id, e, exc_info=True)
+            await status_message.edit_text("An error occurred while preparing your watchlist analysis. Please try again later.")
+            return
+        if summary["batch_id"] is None:
+            if summary["reused"]:
+                await status_message.edit_text("Every readable watchlist filing was analyzed before; the digest is below.")
+            else:
+                await status_message.edit_text("Nothing to analyze: none of your watchlist tickers has a readable recent filing.")
+            return
+        await status_message.edit_text(
+            f"Submitted {len(summary['submitted'])} filings for analysis "
+            f"({len(summary['reused'])} analyzed earlier, {len(summary['notes'])} skipped). "
+            "You will receive a digest here when the batch completes."
+        )
+
     try:
-        await perform_analysis(loading_message, context, ticker, ticker_data)
-    except Exception as e:
-        logger.error(f"Error during analysis for {ticker}: {str(e)}", exc_info=True)
-        await query.message.reply_text(f"An error occurred during the analysis for {ticker}. Please try again later.")
-    finally:
-        context.user_data['loading'] = False
-        await loading_task
-        await loading_message.delete()
+        job_scheduler.submit(user_id, "batch", job, cost=ANALYSIS_COST)
+    except QueueFullError:
+        await status_message.edit_text("You already have too many requests queued. Please wait for some to finish.")
 
 async def perform_analysis(message, context: ContextTypes.DEFAULT_TYPE, ticker: str, ticker_data: TickerData):
     filing_url = ticker_data.get_latest_filing_url()
@@ -52,18 +108,22 @@ async def perform_analysis(message, context: ContextTypes.DEFAULT_TYPE, ticker:
     base_url = "https://www.otcmarkets.com/otcapi"
     full_url = f"{base_url}{filing_url}"
     
-    logger.info(f"Attempting to fetch filing for {ticker} from URL: {full_url}")
+    logger.info("Attempting to fetch filing for %s from URL: %s", ticker, full_url)
 
-    content = await fetch_filing_content(full_url)
-    logger.info(f"Successfully fetched content for {ticker}. Content size: {len(content)} bytes")
-    
-    text = extract_text_from_pdf(content)
+    try:
+        async with open_filing(full_url) as (document, size):
+            logger.info("Successfully fetched content for %s. Content size: %s bytes", ticker, size)
+            text = extract_text_from_pdf(document)
+    except FilingDownloadError as e:
+        logger.warning("Rejected filing for %s: %s", ticker, e)
+        await message.reply_text(f"Unable to download the filing for {ticker}: {e}.")
+        return
     
     if not text:
         await message.reply_text(f"Unable to extract text from the filing for {ticker}. The document might be in an unsupported format.")
         return
     
-    logger.info(f"Successfully extracted text for {ticker}. Text length: {len(text)} characters")
+    logger.info("Successfully extracted text for %s. Text length: %s characters", ticker, len(text))
     
     analysis = await analyze_with_claude(ticker, text, ticker_data.get_previous_close_price())
     
@@ -71,24 +131,17 @@ async def perform_analysis(message, context: ContextTypes.DEFAULT_TYPE, ticker:
         await message.reply_text(f"Failed to get a valid response from the analysis API for {ticker}. Please try again later.")
         return
     
+    if batch_analyzer.ready:
+        # Lets /analyze_wl reuse this analysis instead of submitting the filing again
+        try:
+            await batch_analyzer.db.save_filing_analyses([(filing_url, ticker, "routed", analysis)])
+        except Exception as e:
+            logger.warning("Could not store analysis for %s: %s", ticker, e)
+
     formatted_analysis = parse_claude_response(analysis)
     
     await send_analysis(message, context, formatted_analysis)
 
-async def fetch_filing_content(filing_url):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    async with aiohttp.ClientSession() as session:
-        async with session.get(filing_url, headers=headers) as response:
-            response.raise_for_status()
-            return await response.read()
-
 async def send_analysis(message, context, formatted_analysis):
-    MAX_MESSAGE_LENGTH = 4000
-    if len(formatted_analysis) > MAX_MESSAGE_LENGTH:
-        chunks = [formatted_analysis[i:i+MAX_MESSAGE_LENGTH] for i in range(0, len(formatted_analysis), MAX_MESSAGE_LENGTH)]
-        for chunk in chunks:
-            await message.reply_text(chunk, parse_mode='HTML')
-    else:
-        await message.reply_text(formatted_analysis, parse_mode='HTML')
\ No newline at end of file
+    # Claude answers in plain text, so bare &, < and > must be escaped before sending as HTML
+    await message_sender.send_long(context.bot, message.chat_id, custom_escape_html(formatted_analysis), parse_mode='HTML')
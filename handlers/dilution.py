@@ -0,0 +1,36 @@
+import logging
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+from utils.dilution import dilution_analytics
+from utils.formatting import format_number, custom_escape_html
+
+"""
+Dilution leaderboard module.
+Serves the /dilution command from the precomputed dilution analytics, listing the
+tickers whose outstanding shares have grown the most.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+async def dilution(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    try:
+        limit = max(1, min(int(context.args[0]), 25)) if context.args else 10
+    except ValueError:
+        limit = 10
+
+    leaders = dilution_analytics.top(limit)
+    if not leaders:
+        await update.message.reply_text("No dilution data available yet. Add tickers to watchlists to start tracking share structure.")
+        return
+
+    lines = ["<b>📉 Top diluters (OS growth):</b>\n"]
+    for i, row in enumerate(leaders, start=1):
+        float_ratio = f"{row['float_ratio'] * 100:.0f}%" if row['float_ratio'] == row['float_ratio'] else "N/A"
+        lines.append(
+            f"{i}. <b>{custom_escape_html(row['ticker'])}</b> "
+            f"{format_number(row['first_os'])} → {format_number(row['last_os'])} "
+            f"(<b>{row['os_growth'] * 100:+.1f}%</b> over {row['days']:.0f}d, float/OS {float_ratio})"
+        )
+    await update.message.reply_text("\n".join(lines), parse_mode=ParseMode.HTML)
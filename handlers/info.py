@@ -3,12 +3,16 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 from telegram.error import BadRequest
-from api.otc_markets import get_profile_data, get_trade_data, get_news_data
+from config import Config
+from api.otc_markets import get_profile_data, get_trade_data, is_transient_error
 from utils.formatting import format_number, format_timestamp, custom_escape_html
 from models.ticker_data import TickerData
 import urllib.parse
-import asyncio
-from telegram.error import TimedOut, NetworkError
+from utils.resilience import CircuitOpenError
+from utils.shared_state import coalesce
+from utils.log_setup import capped
+from utils.symbol_directory import symbol_directory
+from utils.news_ingester import news_ingester
 from datetime import datetime
 
 
@@ -25,7 +29,10 @@ logger = logging.getLogger(__name__)
 ticker_data = {}
 
 async def is_valid_ticker(text: str) -> bool:
-    return 3 <= len(text) <= 5 and text.isalpha()
+    if not (3 <= len(text) <= 5 and text.isalpha()):
+        return False
+    # Until the directory has loaded, fall back to the shape check alone
+    return text in symbol_directory if symbol_directory.is_loaded else True
 
 async def info(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     global ticker_data
@@ -41,48 +48,96 @@ async def info(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not ticker:
         return
 
-    max_retries = 3
-    for attempt in range(max_retries):
+    if symbol_directory.is_loaded and ticker not in symbol_directory:
+        suggestions = symbol_directory.suggest_fuzzy(ticker) or symbol_directory.suggest_prefix(ticker, limit=3)
+        hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+        await update.message.reply_text(f"{ticker} is not a known OTC symbol.{hint}")
+        return
+
+    cached = await TickerData.aget(ticker)
+    if cached and not cached.is_outdated():
+        logger.debug("Serving %s from cache", ticker)
         try:
-            await update.message.reply_text(f"Fetching information for ticker: {ticker}")
-            
-            profile_data = await get_profile_data(ticker)
-            trade_data = await get_trade_data(ticker)
-            news_data = await get_news_data(ticker)
-
-            logger.debug(f"Profile data: {profile_data}")
-            logger.debug(f"Trade data: {trade_data}")
-            logger.debug(f"News data: {news_data}")
-
-            try:
-                ticker_data = TickerData(profile_data, trade_data, news_data)
-                TickerData.set(ticker, ticker_data)
-                
-                response_message = format_response(ticker_data, ticker)
-                reply_markup = create_reply_markup(ticker)
-                await update.message.reply_text(response_message, reply_markup=reply_markup, parse_mode=ParseMode.HTML)
-            except Exception as e:
-                logger.error(f"Error formatting or sending response for {ticker}: {str(e)}")
-                await update.message.reply_text(f"An error occurred while processing data for {ticker}. Please try again later.")
-
-            
-            break  # If successful, break out of the retry loop
-        except (TimedOut, NetworkError) as e:
-            if attempt < max_retries - 1:  # i.e. not on the last attempt
-                logger.warning(f"Attempt {attempt + 1} failed: {str(e)}. Retrying...")
-                await asyncio.sleep(1)  # Wait a bit before retrying
+            await send_ticker_info(update, cached, ticker)
+            return
+        except Exception as e:
+            logger.error("Error sending cached response for %s: %s", ticker, e)
+
+    if cached and not cached.is_outdated(Config.CACHE_SERVE_MAX_AGE_HOURS * 60):
+        # Older snapshot (e.g. from the nightly crawl): answer now, then edit in fresh data
+        await refresh_ticker_info(update, cached, ticker)
+        return
+
+    await update.message.reply_text(f"Fetching information for ticker: {ticker}")
+
+    try:
+        ticker_data = await fetch_ticker_data(ticker)
+    except Exception as e:
+        if isinstance(e, CircuitOpenError) or is_transient_error(e):
+            logger.warning("Upstream unavailable for %s: %s", ticker, e)
+            if cached:
+                await send_ticker_info(update, cached, ticker, stale=True)
             else:
-                logger.error(f"Failed to fetch info after {max_retries} attempts: {str(e)}")
                 await update.message.reply_text("Sorry, I'm having trouble fetching the information. Please try again later.")
-                return
-        except Exception as e:
-            logger.error(f"Error fetching data for {ticker}: {str(e)}")
-            await update.message.reply_text(f"An error occurred while fetching data for {ticker}. Please try again later.")
             return
+        logger.error("Error fetching data for %s: %s", ticker, e)
+        await update.message.reply_text(f"An error occurred while fetching data for {ticker}. Please try again later.")
+        return
+
+    try:
+        await send_ticker_info(update, ticker_data, ticker)
+    except Exception as e:
+        logger.error("Error formatting or sending response for %s: %s", ticker, e)
+        await update.message.reply_text(f"An error occurred while processing data for {ticker}. Please try again later.")
+
+async def send_ticker_info(update: Update, ticker_data, ticker, stale=False, refreshing=False):
+    response_message = format_response(ticker_data, ticker)
+    fetched_at = ticker_data.timestamp.strftime('%Y-%m-%d %H:%M')
+    if stale:
+        response_message = f"<i>⚠️ OTC Markets is not responding, showing data cached at {fetched_at}.</i>\n\n" + response_message
+    elif refreshing:
+        response_message = f"<i>⏳ Showing data from {fetched_at}, refreshing...</i>\n\n" + response_message
+    reply_markup = create_reply_markup(ticker)
+    return await update.message.reply_text(response_message, reply_markup=reply_markup, parse_mode=ParseMode.HTML)
+
+async def refresh_ticker_info(update: Update, cached, ticker):
+    message = await send_ticker_info(update, cached, ticker, refreshing=True)
+    try:
+        fresh = await fetch_ticker_data(ticker)
+    except Exception as e:
+        logger.warning("Refresh failed for %s, keeping the cached answer: %s", ticker, e)
+        fetched_at = cached.timestamp.strftime('%Y-%m-%d %H:%M')
+        text = f"<i>⚠️ Could not refresh, showing data cached at {fetched_at}.</i>\n\n" + format_response(cached, ticker)
+    else:
+        text = format_response(fresh, ticker)
+    try:
+        await message.edit_text(text, reply_markup=create_reply_markup(ticker), parse_mode=ParseMode.HTML)
+    except BadRequest as e:
+        logger.debug("Could not update refreshed reply for %s: %s", ticker, e)
+
+async def fetch_ticker_data(ticker):
+    """Fetch profile, trade and news data for a ticker and store it in the cache.
+    Concurrent requests for the same ticker, on this or another worker, share one fetch."""
+    return await coalesce(
+        f"ticker:{ticker.upper()}",
+        lambda: _fetch_ticker_data(ticker),
+        lookup=lambda: TickerData.aget(ticker),
+    )
+
+async def _fetch_ticker_data(ticker):
+    profile_data = await get_profile_data(ticker)
+    trade_data = await get_trade_data(ticker)
+    news_data = await news_ingester.get_news(ticker)
+
+    logger.debug("Fetched %s: profile %s, trade %s, news %s", ticker, capped(profile_data), capped(trade_data), capped(news_data))
+
+    ticker_data = TickerData(profile_data, trade_data, news_data)
+    TickerData.set(ticker, ticker_data)
+    return ticker_data
 
 def format_response(ticker_data, ticker):
-    logger.debug(f"Formatting response for {ticker}")
-    logger.debug(f"Ticker data: {ticker_data.__dict__}")
+    logger.debug("Formatting response for %s", ticker)
+    logger.debug("Ticker data: %s", capped(ticker_data.__dict__))
 
     profile = ticker_data.profile_data
     trade = ticker_data.trade_data
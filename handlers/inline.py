@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from telegram import Update, InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+from handlers.info import fetch_ticker_data, format_response, create_reply_markup
+from models.ticker_data import TickerData
+from utils.formatting import format_number
+from utils.message_sender import split_html
+from utils.symbol_directory import symbol_directory
+
+"""
+Inline query module.
+Answers "@bot TICKER" queries from any chat using only the in-memory ticker cache and
+the symbol prefix index, so replies fit inside Telegram's inline timeout. Cache misses
+get a placeholder result and a debounced background fetch, so a later keystroke finds
+warm data. Inline mode must be enabled for the bot in BotFather.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+MAX_RESULTS = 10
+DEBOUNCE_SECONDS = 0.6
+
+# user_id -> pending background fetch, replaced on every keystroke
+_pending_fetches = {}
+
+
+def _article(ticker, ticker_data):
+    security = (ticker_data.profile_data.get("securities") or [{}])[0]
+    card = split_html(format_response(ticker_data, ticker))[0]
+    description = (
+        f"{security.get('tierDisplayName', 'N/A')} · "
+        f"OS {format_number(security.get('outstandingShares', 'N/A'))} · "
+        f"${ticker_data.get_previous_close_price()}"
+    )
+    return InlineQueryResultArticle(
+        id=ticker,
+        title=f"{ticker} — {ticker_data.profile_data.get('name', ticker)}",
+        description=description,
+        input_message_content=InputTextMessageContent(card, parse_mode=ParseMode.HTML, disable_web_page_preview=True),
+        # Callback buttons need a chat message to reply to, so inline cards keep only the link row
+        reply_markup=InlineKeyboardMarkup([create_reply_markup(ticker).inline_keyboard[0]]),
+    )
+
+
+def _placeholder(ticker):
+    return InlineQueryResultArticle(
+        id=f"loading_{ticker}",
+        title=f"Loading {ticker}…",
+        description="Fetching data in the background, keep typing or try again in a moment",
+        input_message_content=InputTextMessageContent(f"Use /info {ticker} for the full profile."),
+    )
+
+
+async def _debounced_fetch(ticker):
+    await asyncio.sleep(DEBOUNCE_SECONDS)
+    try:
+        await fetch_ticker_data(ticker)
+    except Exception as e:
+        logger.warning("Background inline fetch failed for %s: %s", ticker, e)
+
+
+def _schedule_fetch(user_id, ticker):
+    previous = _pending_fetches.get(user_id)
+    if previous and not previous.done():
+        previous.cancel()
+    task = asyncio.create_task(_debounced_fetch(ticker))
+    _pending_fetches[user_id] = task
+    task.add_done_callback(lambda t: _pending_fetches.pop(user_id, None) if _pending_fetches.get(user_id) is t else None)
+
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = update.inline_query
+    text = query.query.strip().lstrip("$").upper()
+    if not text or not text.isalnum() or len(text) > 5:
+        await query.answer([], cache_time=300)
+        return
+
+    if symbol_directory.is_loaded:
+        candidates = symbol_directory.suggest_prefix(text, limit=MAX_RESULTS)
+    else:
+        candidates = [text]
+
+    results = []
+    missing = None
+    for ticker in candidates:
+        ticker_data = TickerData.get(ticker)
+        if ticker_data:
+            results.append(_article(ticker, ticker_data))
+        elif ticker == text and len(text) >= 3:
+            missing = ticker
+
+    if missing:
+        results.insert(0, _placeholder(missing))
+        _schedule_fetch(query.from_user.id, missing)
+
+    # Only cache complete answers; placeholders must be replaced on the next keystroke
+    await query.answer(results, cache_time=0 if missing else 30, is_personal=False)
@@ -0,0 +1,55 @@
+import logging
+import urllib.parse
+from datetime import datetime
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+from utils.data_access import db
+from utils.formatting import custom_escape_html
+from utils.news_ingester import news_ingester
+
+"""
+News search module.
+Handles the /news command, running full-text searches over all ingested OTC news or,
+with the "wl" prefix, only over the tickers in the user's watchlist.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+async def news(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    args = list(context.args or [])
+    watchlist_only = bool(args) and args[0].lower() in ("wl", "watchlist")
+    if watchlist_only:
+        args = args[1:]
+
+    if not args:
+        await update.message.reply_text("Usage: /news <query> or /news wl <query> to search only your watchlist.")
+        return
+
+    query = " ".join(args)
+    try:
+        tickers = await db.get_watched_tickers(update.effective_user.id) if watchlist_only else None
+        if watchlist_only and not tickers:
+            await update.message.reply_text("Your watchlist is empty.")
+            return
+        results = await news_ingester.search(query, tickers)
+    except Exception as e:
+        logger.error("Error searching news for '%s': %s", query, e)
+        await update.message.reply_text("An error occurred while searching news. Please try again later.")
+        return
+
+    if results is None:
+        await update.message.reply_text("News search is not available right now. Please try again later.")
+        return
+
+    if not results:
+        await update.message.reply_text(f"No news found for \"{query}\".")
+        return
+
+    lines = [f"<b>📰 News matching \"{custom_escape_html(query)}\":</b>\n"]
+    for item in results:
+        news_url = f"https://www.otcmarkets.com/stock/{item['ticker']}/news/{urllib.parse.quote(item['title'])}?id={item['id']}"
+        news_date = datetime.fromtimestamp(item['releaseDate'] / 1000).strftime('%Y-%m-%d')
+        lines.append(f"• <b>{custom_escape_html(item['ticker'])}</b> {news_date}: <a href='{news_url}'>{custom_escape_html(item['title'])}</a>")
+    await update.message.reply_text("\n".join(lines), parse_mode=ParseMode.HTML, disable_web_page_preview=True)
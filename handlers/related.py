@@ -0,0 +1,46 @@
+import logging
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+from handlers.info import fetch_ticker_data, is_valid_ticker
+from utils.formatting import custom_escape_html
+from utils.related_index import related_index, describe_key
+
+"""
+Related companies module.
+Serves /related <TICKER> from the officer/contact/address inverted index, listing other
+tickers that share an officer, phone number, email or executive address with it.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+async def related(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not context.args:
+        await update.message.reply_text("Usage: /related <TICKER>")
+        return
+
+    ticker = context.args[0].lstrip("$").upper()
+    if not await is_valid_ticker(ticker):
+        await update.message.reply_text(f"{ticker} is not a known OTC ticker.")
+        return
+
+    if not related_index.keys_for(ticker):
+        # Never fetched yet: loading the profile indexes it through the TickerData listener
+        try:
+            await fetch_ticker_data(ticker)
+        except Exception as e:
+            logger.warning("Could not fetch %s for /related: %s", ticker, e)
+
+    matches = related_index.related(ticker)
+    if not matches:
+        await update.message.reply_text(
+            f"No other tickers share officers, contacts or addresses with {ticker} among the {len(related_index)} profiles indexed so far."
+        )
+        return
+
+    lines = [f"<b>🕸️ Tickers related to {custom_escape_html(ticker)}:</b>\n"]
+    for other, keys in matches:
+        shared = "; ".join(f"{label}: {custom_escape_html(value)}" for label, value in map(describe_key, keys))
+        lines.append(f"• <b>{custom_escape_html(other)}</b> — {shared}")
+    await update.message.reply_text("\n".join(lines), parse_mode=ParseMode.HTML)
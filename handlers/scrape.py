@@ -6,6 +6,7 @@ from models.ticker_data import TickerData
 import logging
 import asyncio
 from utils.loading_animation import loading_animation
+from utils.job_scheduler import job_scheduler, QueueFullError
 
 """
 Social media scraping handler module.
@@ -16,12 +17,15 @@ particularly focusing on X.com (Twitter) profile data and recent tweets.
 
 logger = logging.getLogger(__name__)
 
+# Relative cost units used for per-user accounting in the job scheduler
+SCRAPE_COST = 3
+
 async def scrape_x_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
     await query.answer()
     
     ticker = query.data.split('_')[-1]
-    ticker_data = TickerData.get(ticker)
+    ticker_data = await TickerData.aget(ticker)
     
     if not ticker_data:
         await query.edit_message_text(f"No data found for {ticker}.")
@@ -34,29 +38,39 @@ async def scrape_x_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         return
     
     loading_message = await query.message.reply_text(f"Retrieving tweets for {ticker}...")
-    context.user_data['loading'] = True
-    loading_task = asyncio.create_task(loading_animation(loading_message, f"Retrieving tweets for {ticker}...", context))
 
-    try:
-        tweets = await scrape_tweets(twitter_url)
-        
-        if tweets:
-            tweet_info = format_tweets(tweets, twitter_url, ticker)
+    async def on_position(position):
+        await loading_message.edit_text(f"⏳ Tweet retrieval for {ticker} is queued (position {position})...")
+
+    async def job():
+        # Per-job flag: a user may have several jobs running, each with its own status message
+        done = asyncio.Event()
+        loading_task = asyncio.create_task(loading_animation(loading_message, f"Retrieving tweets for {ticker}...", done))
+        try:
+            tweets = await scrape_tweets(twitter_url)
             
-            await query.edit_message_text(
-                text=tweet_info,
-                parse_mode=ParseMode.HTML,
-                disable_web_page_preview=True
-            )
-        else:
-            await query.edit_message_text(f"No tweets found for {ticker} ({twitter_url}).")
-    except Exception as e:
-        logger.error(f"Error scraping X.com tweets: {str(e)}")
-        await query.edit_message_text(f"An error occurred while fetching tweets for {ticker} ({twitter_url}).")
-    finally:
-        context.user_data['loading'] = False
-        await loading_task
-        await loading_message.delete()
+            if tweets:
+                tweet_info = format_tweets(tweets, twitter_url, ticker)
+                
+                await query.edit_message_text(
+                    text=tweet_info,
+                    parse_mode=ParseMode.HTML,
+                    disable_web_page_preview=True
+                )
+            else:
+                await query.edit_message_text(f"No tweets found for {ticker} ({twitter_url}).")
+        except Exception as e:
+            logger.error("Error scraping X.com tweets: %s", e)
+            await query.edit_message_text(f"An error occurred while fetching tweets for {ticker} ({twitter_url}).")
+        finally:
+            done.set()
+            await loading_task
+            await loading_message.delete()
+
+    try:
+        job_scheduler.submit(update.effective_user.id, "scrapfly", job, cost=SCRAPE_COST, on_position=on_position)
+    except QueueFullError:
+        await loading_message.edit_text("You already have too many requests queued. Please wait for some to finish.")
 
 def format_tweets(tweets, twitter_url, ticker):
     username = twitter_url.split('/')[-1]
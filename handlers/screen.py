@@ -0,0 +1,50 @@
+import logging
+from telegram import Update
+from telegram.constants import ParseMode
+from telegram.ext import ContextTypes
+from utils.formatting import format_number, custom_escape_html
+from utils.screener import screener, ScreenError
+
+"""
+Screener command module.
+Serves /screen from the columnar ticker table, e.g.
+/screen tier=current caveat=no float<50M os<500M filed<30d
+
+"""
+
+logger = logging.getLogger(__name__)
+
+USAGE = (
+    "Usage: /screen <conditions>\n"
+    "Fields: os, dtc, float, price, mcap, filed (days), tier, type\n"
+    "Example: /screen tier=current caveat=no float<50M os<500M filed<30d sort=-mcap limit=20"
+)
+
+def _number(value):
+    return "N/A" if value != value else format_number(value)
+
+async def screen(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not context.args:
+        await update.message.reply_text(USAGE)
+        return
+
+    try:
+        rows, total, elapsed_ms = screener.screen(" ".join(context.args))
+    except ScreenError as e:
+        await update.message.reply_text(f"{e}\n\n{USAGE}")
+        return
+
+    if not rows:
+        await update.message.reply_text(f"No tickers match among the {len(screener)} screened.")
+        return
+
+    lines = [f"<b>🔎 {total} of {len(screener)} tickers match</b> ({elapsed_ms:.1f} ms)\n"]
+    for i, row in enumerate(rows, start=1):
+        filed = f"{row['filing_age_days']:.0f}d ago" if row['filing_age_days'] == row['filing_age_days'] else "N/A"
+        close = f"${row['close']:g}" if row['close'] == row['close'] else "N/A"
+        lines.append(
+            f"{i}. <b>{custom_escape_html(row['ticker'])}</b> {close} · "
+            f"float {_number(row['float_shares'])} · OS {_number(row['outstanding_shares'])} · "
+            f"{custom_escape_html(row['tier'] or 'N/A')} · {custom_escape_html(row['filing_type'] or 'N/A')} {filed}"
+        )
+    await update.message.reply_text("\n".join(lines), parse_mode=ParseMode.HTML)
@@ -17,6 +17,11 @@ async def setup_commands(bot):
     commands = [
         BotCommand("info", "Get stock information (usage: /info <TICKER>)"),
         BotCommand("wl", "View your watchlist"),
+        BotCommand("analyze_wl", "Analyze the latest filing of every watchlist ticker"),
+        BotCommand("news", "Search OTC news (usage: /news [wl] <query>)"),
+        BotCommand("screen", "Screen tickers (usage: /screen tier=current caveat=no float<50M filed<30d)"),
+        BotCommand("related", "Tickers sharing officers, contacts or addresses (usage: /related <TICKER>)"),
+        BotCommand("dilution", "Top diluters by outstanding share growth (usage: /dilution [N])"),
         BotCommand("premium", "Manage premium status and subscription"),
     ]
     await bot.set_my_commands(commands)
\ No newline at end of file
@@ -1,11 +1,12 @@
 import logging
+from contextlib import aclosing
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 from models.ticker_data import TickerData
-from utils.google_sheets import add_to_sheet, get_watchlist_from_sheet
 from datetime import datetime
-from utils.formatting import convert_timestamp, format_number
-from utils.data_access import DataAccess
+from utils.formatting import convert_timestamp, format_number, custom_escape_html
+from utils.message_sender import message_sender
+from utils.data_access import db
 
 
 logger = logging.getLogger(__name__)
@@ -20,25 +21,25 @@ and retrieving watchlist data from Google Sheets.
 
 WAITING_FOR_NOTE = 1
 
-db = DataAccess()
-
 async def view_watchlist(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handler for viewing user's watchlist"""
     try:
         user_id = update.effective_user.id
-        watchlist = await db.get_user_watchlist(user_id)
+        async with aclosing(db.iter_user_watchlist(user_id)) as watchlist:
+            lines = [
+                f"${custom_escape_html(ticker)} - {custom_escape_html(note)}"
+                async for ticker, note in watchlist
+            ]
         
-        if watchlist:
-            watchlist_text = "Your current watchlist:\n\n" + "\n".join([
-                f"${ticker} - {note}" for ticker, note in watchlist
-            ])
+        if lines:
+            watchlist_text = "Your current watchlist:\n\n" + "\n".join(lines)
         else:
             watchlist_text = "Your watchlist is empty."
         
-        await update.message.reply_text(watchlist_text)
+        await message_sender.send_long(context.bot, update.effective_chat.id, watchlist_text)
         
     except Exception as e:
-        logger.error(f"Error viewing watchlist: {e}")
+        logger.error("Error viewing watchlist: %s", e)
         await update.message.reply_text("An error occurred while fetching your watchlist. Please try again later.")
 
 async def add_to_watchlist(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -66,7 +67,7 @@ async def save_note_and_add_to_watchlist(update: Update, context: ContextTypes.D
             await update.message.reply_text("Sorry, there was an error. Please try adding the stock again.")
             return ConversationHandler.END
 
-        ticker_data = TickerData.get(ticker)
+        ticker_data = await TickerData.aget(ticker)
         if not ticker_data:
             await update.message.reply_text(f"Error: Data not found for {ticker}. Please fetch the info again using /info {ticker}")
             return ConversationHandler.END
@@ -109,18 +110,18 @@ async def save_note_and_add_to_watchlist(update: Update, context: ContextTypes.D
             'notes': user_note
         }
 
-        logger.info(f"Attempting to add {ticker} to watchlist for user {user_id}")
+        logger.info("Attempting to add %s to watchlist for user %s", ticker, user_id)
         success = await db.add_stock_to_watchlist(values)
         
         if success:
             await update.message.reply_text(f"{ticker} has been added to your watchlist with your note!")
-            logger.info(f"Successfully added {ticker} to watchlist for user {user_id}")
+            logger.info("Successfully added %s to watchlist for user %s", ticker, user_id)
             return ConversationHandler.END
         else:
             raise Exception("Failed to add to watchlist")
 
     except Exception as e:
-        logger.error(f"Error adding {ticker} to watchlist: {e}", exc_info=True)
+        logger.error("Error adding %s to watchlist: %s", ticker, e, exc_info=True)
         await update.message.reply_text(f"An error occurred while adding {ticker} to the watchlist. Please try again later.")
     return ConversationHandler.END
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -27,5 +27,5 @@ async def send_to_webhook(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 else:
                     await query.edit_message_text(f"Failed to send {ticker} to webhook. Status code: {response.status}")
         except Exception as e:
-            logger.error(f"Error sending to webhook: {str(e)}")
+            logger.error("Error sending to webhook: %s", e)
             await query.edit_message_text(f"An error occurred while sending {ticker} to webhook.")
\ No newline at end of file
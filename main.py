@@ -1,12 +1,32 @@
+import time
+_process_started = time.perf_counter()
+
 import logging
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ConversationHandler, MessageHandler, filters
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ConversationHandler, InlineQueryHandler, MessageHandler, filters
 from config import Config
-from handlers import start, info, watchlist, analyze, scrape
+from handlers import start, info, watchlist, analyze, scrape, dilution, admin, inline, news, related, screen
 from utils.rate_limiter import RateLimiter
 from telegram.error import TimedOut, NetworkError
 from telegram.request import HTTPXRequest
 import asyncio
-from utils.data_access import DataAccess
+from utils.data_access import db
+from utils.ticker_cache import TickerCacheStore
+from api import otc_markets
+from utils import filing_download
+from utils.shared_state import SharedStatePersistence, SharedTickerCache, get_backend
+from utils.symbol_directory import symbol_directory
+from utils.alert_engine import AlertEngine
+from models.ticker_data import TickerData
+from repos.ticker_repo import ticker_repo
+from utils.dilution import dilution_analytics
+from utils.startup import StartupTimer
+from utils.news_ingester import news_ingester
+from utils.batch_analysis import batch_analyzer
+from utils.related_index import related_index
+from utils.screener import screener
+from utils.universe_crawler import UniverseCrawler
+from api.message_batches import message_batch_client
+from utils.log_setup import setup_logging
 
 """
 Application entry point and bot initialization module.
@@ -14,16 +34,96 @@ Sets up the Telegram bot with command handlers, conversation handlers,
 and callback query handlers. Configures logging and starts the bot polling process.
 """
 
-logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.ERROR)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 rate_limiter = RateLimiter(max_calls=30, time_frame=1)
 
-# Initialize the database instance
-db = DataAccess()
+startup_timer = StartupTimer(_process_started)
+startup_timer.mark("imports")
+
+# Persistent second cache tier behind TickerData
+ticker_cache = TickerCacheStore(db)
+
+# Ticker cache shared between workers (no-op with the in-process backend)
+shared_ticker_cache = SharedTickerCache()
+
+# Long-running background loops, kept referenced so they are not garbage collected
+background_tasks = set()
+
+def start_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
 
 async def post_init(application: Application) -> None:
-    await start.setup_commands(application.bot)
+    # Independent startup work runs concurrently; only the DB-backed steps wait on the pool
+    await asyncio.gather(
+        _timed("telegram commands", start.setup_commands(application.bot)),
+        _timed("database + caches", _init_database_backed()),
+        _timed("symbol directory", asyncio.to_thread(symbol_directory.load_file)),
+        _timed("related index", asyncio.to_thread(related_index.load_file)),
+    )
+
+    # Misses are served from the shared cache first, then from the persistent tier
+    shared_ticker_cache.attach()
+    ticker_cache.attach()
+    ticker_cache.start()
+    TickerData.add_listener(ticker_repo.listener)
+    related_index.index_cached()
+    TickerData.add_listener(related_index.listener)
+    screener.load(ticker_repo.all_latest(), TickerData.items())
+    TickerData.add_listener(screener.listener)
+
+    start_background(symbol_directory.run())
+    start_background(ticker_repo.run())
+    start_background(dilution_analytics.run())
+    start_background(AlertEngine(db, application.bot).run())
+    start_background(news_ingester.run())
+    start_background(batch_analyzer.run(application.bot))
+    start_background(related_index.run())
+    if Config.CRAWL_ENABLED:
+        start_background(UniverseCrawler(db, ticker_cache, flushers=(ticker_repo.flush,)).run())
+    startup_timer.mark("ready to poll")
+    startup_timer.report()
+
+async def _timed(name, awaitable):
+    with startup_timer.step(name):
+        try:
+            return await awaitable
+        except Exception as e:
+            logger.error("Startup step '%s' failed: %s", name, e)
+
+async def _init_database_backed():
+    if Config.DATABASE_URL:
+        try:
+            await init_database()
+        except Exception:
+            pass  # Already logged; caches fall back to SQLite / memory
+    ticker_repo.setup(db)
+    dilution_analytics.db = db
+
+    async def load_ticker_repo():
+        if db.pool:
+            await ticker_repo.create_schema()
+            await ticker_repo.load_latest()
+
+    results = await asyncio.gather(ticker_cache.warm_start(), load_ticker_repo(), return_exceptions=True)
+    for name, result in zip(("ticker cache", "ticker snapshots"), results):
+        if isinstance(result, Exception):
+            logger.error("Failed to load %s: %s", name, result)
+
+async def post_shutdown(application: Application) -> None:
+    for task in list(background_tasks):
+        task.cancel()
+    await ticker_cache.close()
+    await ticker_repo.flush()
+    await related_index.save()
+    await otc_markets.close_session()
+    await filing_download.close_session()
+    await message_batch_client.close()
+    await get_backend().close()
 
 async def init_database():
     """Initialize database connection asynchronously"""
@@ -31,7 +131,7 @@ async def init_database():
         await db.connect()
         logger.info("Database connection established")
     except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
+        logger.error("Failed to initialize database: %s", e)
         raise
 
 def main() -> None:
@@ -40,10 +140,10 @@ def main() -> None:
     asyncio.set_event_loop(loop)
     
     try:
-        # Initialize database
-        loop.run_until_complete(init_database())
-        
-        application = Application.builder().token(Config.TELEGRAM_TOKEN).build()
+        builder = Application.builder().token(Config.TELEGRAM_TOKEN)
+        if get_backend().is_shared:
+            builder = builder.persistence(SharedStatePersistence())
+        application = builder.build()
 
         # Create ConversationHandler
         conv_handler = ConversationHandler(
@@ -53,7 +153,9 @@ def main() -> None:
             },
             fallbacks=[CommandHandler("cancel", watchlist.cancel)],
             per_message=False,
-            per_chat=True
+            per_chat=True,
+            name="watchlist_note",
+            persistent=get_backend().is_shared
         )
 
         # Add handlers
@@ -61,18 +163,26 @@ def main() -> None:
         application.add_handler(CommandHandler("start", start.start))
         application.add_handler(CommandHandler("info", info.info))
         application.add_handler(CommandHandler("wl", watchlist.view_watchlist))
+        application.add_handler(CommandHandler("dilution", dilution.dilution))
+        application.add_handler(CommandHandler("related", related.related))
+        application.add_handler(CommandHandler("screen", screen.screen))
+        application.add_handler(CommandHandler("dbstats", admin.dbstats))
+        application.add_handler(CommandHandler("news", news.news))
+        application.add_handler(CommandHandler("analyze_wl", analyze.analyze_watchlist))
         application.add_handler(CallbackQueryHandler(analyze.analyze_report_button, pattern="^analyzereport_"))
         application.add_handler(CallbackQueryHandler(scrape.scrape_x_profile, pattern="^scrape_xprofile_"))
+        application.add_handler(InlineQueryHandler(inline.inline_query))
         application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, info.info))
 
-        # Set up post-init hook
+        # Set up post-init and post-shutdown hooks
         application.post_init = post_init
+        application.post_shutdown = post_shutdown
 
         # Start the bot
         application.run_polling(poll_interval=1.0)
         
     except Exception as e:
-        logger.error(f"Error in main: {e}")
+        logger.error("Error in main: %s", e)
         raise
     finally:
         loop.close()
@@ -1,5 +1,6 @@
 from datetime import datetime
 import logging
+from utils.log_setup import capped
 
 """
 Stock ticker data management module.
@@ -12,25 +13,85 @@ logger = logging.getLogger(__name__)
 
 class TickerData:
     _instances = {}
+    _listeners = []
+    _remote_loaders = []
 
-    def __init__(self, profile_data, trade_data, news_data):
+    def __init__(self, profile_data, trade_data, news_data, timestamp=None):
         self.profile_data = profile_data
         self.trade_data = trade_data
         self.news_data = news_data
-        self.timestamp = datetime.now()
-        logger.debug(f"TickerData initialized with: {self.__dict__}")
+        self.timestamp = timestamp or datetime.now()
+        logger.debug("TickerData initialized with: %s", capped(self.__dict__))
 
     @classmethod
     def get(cls, ticker):
         return cls._instances.get(ticker.upper())
 
+    @classmethod
+    def items(cls):
+        """Snapshot of the in-memory cache as (ticker, instance) pairs, safe to iterate while it changes"""
+        return list(cls._instances.items())
+
     @classmethod
     def set(cls, ticker, instance):
         cls._instances[ticker.upper()] = instance
+        cls.notify(ticker, instance)
+
+    @classmethod
+    def notify(cls, ticker, instance):
+        """Run the set() listeners without keeping the instance in memory (used by bulk crawls)"""
+        for listener in cls._listeners:
+            listener(ticker.upper(), instance)
+
+    @classmethod
+    async def aget(cls, ticker, keep=True):
+        """
+        Like get(), but falls back to the registered loaders (shared cache, persistent
+        cache) in order when the local copy is missing or outdated. With keep=False a
+        remote hit is returned without being kept in memory (used by bulk crawls)
+        """
+        instance = cls.get(ticker)
+        if instance and not instance.is_outdated():
+            return instance
+        for loader in cls._remote_loaders:
+            remote = await loader(ticker)
+            if remote and (not instance or remote.timestamp > instance.timestamp):
+                if keep:
+                    cls._instances[ticker.upper()] = remote
+                return remote
+        return instance
+
+    @classmethod
+    def add_remote_loader(cls, loader):
+        """Register an async callable(ticker) returning a TickerData from another cache tier, or None"""
+        cls._remote_loaders.append(loader)
+
+    @classmethod
+    def add_listener(cls, listener):
+        """Register a callback invoked with (ticker, instance) on every set()"""
+        cls._listeners.append(listener)
+
+    @classmethod
+    def load_many(cls, instances):
+        """Bulk-populate the in-memory cache without notifying listeners"""
+        for ticker, instance in instances.items():
+            cls._instances[ticker.upper()] = instance
+
+    def to_dict(self):
+        return {
+            "profile_data": self.profile_data,
+            "trade_data": self.trade_data,
+            "news_data": self.news_data,
+            "timestamp": self.timestamp,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["profile_data"], data["trade_data"], data["news_data"], timestamp=data.get("timestamp"))
 
     def get_latest_filing_url(self):
         url = self.profile_data.get("latestFilingUrl", "N/A")
-        logger.debug(f"Latest filing URL: {url}")
+        logger.debug("Latest filing URL: %s", url)
         return url
 
     def get_previous_close_price(self):
@@ -41,4 +102,4 @@ class TickerData:
 
     def is_outdated(self, max_age_minutes=30):
         age = datetime.now() - self.timestamp
-        return age.total_seconds() / 60 > max_age_minutes
\ No newline at end of file
+        return age.total_seconds() / 60 > max_age_minutes
@@ -1,4 +1,244 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+import numpy as np
+from utils.formatting import convert_timestamp
 
-# 1.get_latest_info
-# 2.update_info
-# 3.get_history
+"""
+Ticker snapshot repository module.
+Records every fetched snapshot of a ticker's share structure, close, tier and latest
+filing as a compact time series. Rows are delta-encoded: a bitmask says which fields
+changed and only those columns are filled, with a full keyframe every KEYFRAME_EVERY
+rows so range queries never have to scan a ticker's whole history. The latest values
+are kept in an in-memory index; history is returned as NumPy arrays.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("outstanding_shares", "dtc_shares", "float_shares", "close", "tier", "filing_type", "filing_date")
+NUMERIC_FIELDS = ("outstanding_shares", "dtc_shares", "float_shares", "close")
+FULL_MASK = (1 << len(FIELDS)) - 1
+KEYFRAME_EVERY = 48
+HEARTBEAT = timedelta(hours=1)
+
+
+def _to_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def snapshot_fields(ticker_data):
+    """Extract the tracked fields from a TickerData instance"""
+    profile = ticker_data.profile_data or {}
+    trade = ticker_data.trade_data or {}
+    security = (profile.get("securities") or [{}])[0]
+    return {
+        "outstanding_shares": _to_number(security.get("outstandingShares")),
+        "dtc_shares": _to_number(security.get("dtcShares")),
+        "float_shares": _to_number(security.get("publicFloat")),
+        "close": _to_number(trade.get("previousClose")),
+        "tier": security.get("tierDisplayName"),
+        "filing_type": profile.get("latestFilingType"),
+        "filing_date": convert_timestamp(profile.get("latestFilingDate")),
+    }
+
+
+class TickerRepo:
+    def __init__(self, db=None):
+        self.db = db
+        self._latest = {}
+        self._rows_since_keyframe = {}
+        self._pending = []
+
+    def setup(self, db):
+        self.db = db
+
+    async def create_schema(self):
+        await self.db.ensure_connection()
+        async with self.db.acquire() as conn:
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS ticker_snapshots (
+                    ticker TEXT NOT NULL,
+                    ts TIMESTAMP NOT NULL,
+                    mask SMALLINT NOT NULL,
+                    outstanding_shares DOUBLE PRECISION,
+                    dtc_shares DOUBLE PRECISION,
+                    float_shares DOUBLE PRECISION,
+                    close DOUBLE PRECISION,
+                    tier TEXT,
+                    filing_type TEXT,
+                    filing_date TIMESTAMP
+                )
+            ''')
+            await conn.execute('CREATE INDEX IF NOT EXISTS ticker_snapshots_ticker_ts ON ticker_snapshots (ticker, ts)')
+
+    async def load_latest(self):
+        """Rebuild the in-memory latest index from the stored deltas"""
+        async with self.db.acquire() as conn:
+            rows = await conn.fetch(f'''
+                SELECT ticker, max(ts) AS ts,
+                    {", ".join(
+                        f"(array_agg({field} ORDER BY ts DESC) FILTER (WHERE mask & {1 << i} <> 0))[1] AS {field}"
+                        for i, field in enumerate(FIELDS)
+                    )}
+                FROM ticker_snapshots
+                GROUP BY ticker
+            ''')
+        for row in rows:
+            self._latest[row["ticker"]] = dict(row)
+            # Force a keyframe on the next write after a restart
+            self._rows_since_keyframe[row["ticker"]] = KEYFRAME_EVERY
+        logger.info("Loaded latest snapshots for %s tickers", len(rows))
+
+    def get_latest_info(self, ticker):
+        """Latest recorded values for a ticker (dict with ts and FIELDS), or None"""
+        return self._latest.get(ticker.upper())
+
+    def all_latest(self):
+        return self._latest
+
+    def update_info(self, ticker, ticker_data, ts=None):
+        """Record a snapshot; only changed fields are stored. Writes are flushed in batches."""
+        ticker = ticker.upper()
+        ts = ts or ticker_data.timestamp or datetime.now()
+        fields = snapshot_fields(ticker_data)
+        previous = self._latest.get(ticker)
+
+        keyframe = previous is None or self._rows_since_keyframe.get(ticker, 0) >= KEYFRAME_EVERY
+        if keyframe:
+            mask = FULL_MASK
+        else:
+            mask = 0
+            for i, field in enumerate(FIELDS):
+                if fields[field] != previous.get(field):
+                    mask |= 1 << i
+            if mask == 0 and ts - previous["ts"] < HEARTBEAT:
+                return False
+
+        row = [ticker, ts, mask] + [fields[field] if mask & (1 << i) else None for i, field in enumerate(FIELDS)]
+        self._pending.append(row)
+        self._latest[ticker] = dict(fields, ticker=ticker, ts=ts)
+        self._rows_since_keyframe[ticker] = 0 if keyframe else self._rows_since_keyframe.get(ticker, 0) + 1
+        return True
+
+    def listener(self, ticker, instance):
+        """TickerData.add_listener callback"""
+        self.update_info(ticker, instance)
+
+    async def flush(self):
+        if self.db is None or not self.db.pool:
+            # No database: keep only the in-memory latest index
+            self._pending.clear()
+            return 0
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, []
+        try:
+            async with self.db.acquire() as conn:
+                await conn.executemany(f'''
+                    INSERT INTO ticker_snapshots (ticker, ts, mask, {", ".join(FIELDS)})
+                    VALUES ({", ".join(f"${i}" for i in range(1, len(FIELDS) + 4))})
+                ''', pending)
+            return len(pending)
+        except Exception as e:
+            logger.error("Failed to write ticker snapshots: %s", e)
+            self._pending = pending + self._pending
+            return 0
+
+    async def run(self, interval=30):
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def get_history(self, ticker, start=None, end=None):
+        """
+        Snapshots for ticker between start and end, forward-filled into arrays:
+        'ts' is datetime64[s], numeric fields are float64 (NaN when unknown) and
+        text fields are object arrays.
+        """
+        ticker = ticker.upper()
+        end = end or datetime.now()
+        start = start or datetime(1970, 1, 1)
+        async with self.db.acquire() as conn:
+            rows = await conn.fetch(f'''
+                SELECT ts, mask, {", ".join(FIELDS)}
+                FROM ticker_snapshots
+                WHERE ticker = $1 AND ts <= $3 AND ts >= COALESCE((
+                    SELECT max(ts) FROM ticker_snapshots
+                    WHERE ticker = $1 AND mask = {FULL_MASK} AND ts <= $2
+                ), $2)
+                ORDER BY ts
+            ''', ticker, start, end)
+        return self._decode(rows, start)
+
+    async def get_numeric_histories(self, tickers):
+        """
+        Full numeric history of many tickers in one query, forward-filled with NumPy.
+        Returns equally sized arrays ordered by (ticker, ts): 'ticker' (object), 'ts'
+        (int64 epoch seconds) and the NUMERIC_FIELDS as float64, NaN when unknown.
+        """
+        tickers = [ticker.upper() for ticker in tickers]
+        order = "ORDER BY ticker, ts"
+        async with self.db.acquire() as conn:
+            # Aggregated server-side so each column arrives as a single array
+            row = await conn.fetchrow(f'''
+                SELECT
+                    array_agg(ticker {order}) AS ticker,
+                    array_agg(extract(epoch FROM ts)::bigint {order}) AS ts,
+                    array_agg(mask {order}) AS mask,
+                    {", ".join(f"array_agg({field} {order}) AS {field}" for field in NUMERIC_FIELDS)}
+                FROM ticker_snapshots
+                WHERE ticker = ANY($1::text[])
+            ''', tickers)
+
+        if row is None or row["ticker"] is None:
+            history = {"ticker": np.array([], dtype=object), "ts": np.array([], dtype=np.int64)}
+            history.update({field: np.array([], dtype=np.float64) for field in NUMERIC_FIELDS})
+            return history
+
+        ticker_column = np.array(row["ticker"], dtype=object)
+        mask = np.array(row["mask"], dtype=np.int64)
+        positions = np.arange(mask.size)
+        group_start = np.r_[True, ticker_column[1:] != ticker_column[:-1]]
+
+        history = {"ticker": ticker_column, "ts": np.array(row["ts"], dtype=np.int64)}
+        for field in NUMERIC_FIELDS:
+            values = np.array(row[field], dtype=np.float64)
+            # A field is known where its bit is set; the first row of every ticker resets
+            # the fill so one ticker's values never leak into the next
+            present = (mask & (1 << FIELDS.index(field))) != 0
+            values[~present] = np.nan
+            source = np.maximum.accumulate(np.where(present | group_start, positions, 0))
+            history[field] = values[source]
+        return history
+
+    @staticmethod
+    def _decode(rows, start):
+        current = {field: None for field in FIELDS}
+        columns = {field: [] for field in FIELDS}
+        timestamps = []
+        for row in rows:
+            mask = row["mask"]
+            for i, field in enumerate(FIELDS):
+                if mask & (1 << i):
+                    current[field] = row[field]
+            # Rows before start only seed the forward fill
+            if row["ts"] < start:
+                continue
+            timestamps.append(row["ts"])
+            for field in FIELDS:
+                columns[field].append(current[field])
+
+        history = {"ts": np.array(timestamps, dtype="datetime64[s]")}
+        for field in FIELDS:
+            if field in NUMERIC_FIELDS:
+                history[field] = np.array([np.nan if v is None else v for v in columns[field]], dtype=np.float64)
+            else:
+                history[field] = np.array(columns[field], dtype=object)
+        return history
+
+
+ticker_repo = TickerRepo()
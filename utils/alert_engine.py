@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from telegram.constants import ParseMode
+from telegram.error import Forbidden
+from api.otc_markets import get_profile_data
+from config import Config
+from utils.formatting import convert_timestamp, format_number, custom_escape_html
+from utils.message_sender import message_sender
+from utils.shared_state import run_as_leader
+
+"""
+Watchlist change-alert module.
+Polls every distinct watched ticker once per cycle, no matter how many users watch it,
+diffs the fresh profile against the last state it saw for that ticker (kept in its own
+alert_snapshots table, so users' watchlist rows are never rewritten) and notifies each
+watcher through the rate-limited message sender.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_from_profile(profile):
+    security = profile.get("securities", [{}])[0]
+    return {
+        'outstanding_shares': security.get('outstandingShares', 0),
+        'latest_filing_type': profile.get('latestFilingType', 'N/A'),
+        'filing_date': convert_timestamp(profile.get('latestFilingDate')),
+        'is_caveat_emptor': profile.get('isCaveatEmptor', False),
+        'tier': security.get('tierDisplayName', 'N/A'),
+    }
+
+
+def diff_snapshot(stored, fresh):
+    """Return human-readable change lines between a stored row and a fresh snapshot"""
+    changes = []
+
+    if stored.get('filing_date') and fresh['filing_date'] and fresh['filing_date'] != stored['filing_date']:
+        changes.append(
+            f"📄 New filing: {custom_escape_html(fresh['latest_filing_type'])} "
+            f"({fresh['filing_date'].strftime('%Y-%m-%d')})"
+        )
+
+    if stored.get('tier') and fresh['tier'] != stored['tier']:
+        changes.append(f"🏷️ Tier changed: {custom_escape_html(stored['tier'])} → {custom_escape_html(fresh['tier'])}")
+
+    if bool(fresh['is_caveat_emptor']) != bool(stored.get('is_caveat_emptor')):
+        changes.append("☠️ Caveat Emptor flag added" if fresh['is_caveat_emptor'] else "✅ Caveat Emptor flag removed")
+
+    old_os, new_os = stored.get('outstanding_shares') or 0, fresh['outstanding_shares'] or 0
+    if old_os and new_os and new_os != old_os:
+        change = (new_os - old_os) / old_os * 100
+        changes.append(f"💼 Outstanding shares: {format_number(old_os)} → {format_number(new_os)} ({change:+.1f}%)")
+
+    return changes
+
+
+class AlertEngine:
+    def __init__(self, db, bot=None, interval_minutes=None, concurrency=5, initial_delay=60):
+        self.db = db
+        self.initial_delay = initial_delay
+        self.bot = bot
+        self.interval = (interval_minutes or Config.ALERT_POLL_MINUTES) * 60
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def setup(self):
+        await self.db.ensure_alert_schema()
+
+    async def run_cycle(self):
+        watched = await self.db.get_watched_snapshots()
+        logger.info("Alert cycle polling %s distinct tickers", len(watched))
+        results = await asyncio.gather(*(self._check_ticker(row) for row in watched), return_exceptions=True)
+        sent = sum(r for r in results if isinstance(r, int))
+        for row, result in zip(watched, results):
+            if isinstance(result, Exception):
+                logger.error("Alert check failed for %s: %s", row['ticker'], result)
+        return sent
+
+    async def _check_ticker(self, row):
+        ticker = row['ticker']
+        async with self._semaphore:
+            profile = await get_profile_data(ticker)
+
+        fresh = snapshot_from_profile(profile)
+        changes = diff_snapshot(row, fresh)
+        await self.db.save_alert_snapshot(ticker, fresh)
+        if not changes:
+            return 0
+
+        text = f"<b>🔔 {custom_escape_html(ticker)} update</b>\n\n" + "\n".join(changes)
+        sent = 0
+        for user_id in row['user_ids']:
+            try:
+                await message_sender.send(self.bot, user_id, text, parse_mode=ParseMode.HTML)
+                sent += 1
+            except Forbidden:
+                logger.info("User %s blocked the bot, skipping %s alert", user_id, ticker)
+            except Exception as e:
+                logger.error("Failed to send %s alert to %s: %s", ticker, user_id, e)
+        return sent
+
+    async def run(self):
+        """Background loop running one polling cycle per interval, on one worker only"""
+        if not self.db.pool:
+            logger.info("No database configured, watchlist alerts are disabled")
+            return
+        try:
+            await self.setup()
+        except Exception as e:
+            logger.error("Alert engine setup failed: %s", e)
+            return
+        await run_as_leader("alert_engine", self._poll)
+
+    async def _poll(self):
+        # Let startup traffic and first replies go out before the first polling burst
+        await asyncio.sleep(self.initial_delay)
+        while True:
+            try:
+                await self.run_cycle()
+            except Exception as e:
+                logger.error("Alert cycle failed: %s", e)
+            await asyncio.sleep(self.interval)
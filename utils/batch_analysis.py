@@ -0,0 +1,203 @@
+import asyncio
+import logging
+from api.claude import build_prompt, build_questions
+from api.message_batches import message_batch_client
+from api.otc_markets import get_profile_data, get_trade_data
+from config import Config
+from models.ticker_data import TickerData
+from utils.data_access import db
+from utils.filing_download import open_filing, FilingDownloadError
+from utils.formatting import custom_escape_html
+from utils.message_sender import message_sender
+from utils.parsing import parse_claude_response
+from utils.pdf_utils import extract_text_from_pdf
+from utils.shared_state import run_as_leader
+
+"""
+Bulk watchlist analysis module.
+Backs /analyze_wl: resolves the latest filing for every ticker on a user's watchlist,
+reuses the stored analysis of filings analyzed before (by anyone), downloads and
+extracts the rest concurrently and submits them as a single message batch. Pending
+batches are kept in Postgres and polled in the background, so a restart picks polling
+back up, and the results are stored and delivered to the user as one digest together
+with the reused analyses.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+FILING_BASE_URL = "https://www.otcmarkets.com/otcapi"
+
+# Model recorded in a batch's filings for analyses reused from filing_analyses
+STORED_MODEL = "stored"
+
+
+class BatchAnalyzer:
+    def __init__(self, db, client=None, poll_seconds=None, concurrency=None):
+        self.db = db
+        self.client = client or message_batch_client
+        self.poll_seconds = poll_seconds or Config.BATCH_POLL_SECONDS
+        self._semaphore = asyncio.Semaphore(concurrency or Config.BATCH_PREP_CONCURRENCY)
+        self.ready = False
+
+    async def setup(self):
+        await self.db.ensure_batch_schema()
+        self.ready = True
+
+    async def _ticker_data(self, ticker):
+        ticker_data = await TickerData.aget(ticker)
+        if ticker_data:
+            return ticker_data
+        profile_data, trade_data = await asyncio.gather(get_profile_data(ticker), get_trade_data(ticker))
+        return TickerData(profile_data, trade_data, [])
+
+    async def _resolve(self, ticker):
+        """(ticker, filing_url, previous close) or (ticker, None, reason)"""
+        async with self._semaphore:
+            try:
+                ticker_data = await self._ticker_data(ticker)
+            except Exception as e:
+                logger.warning("Could not load %s for batch analysis: %s", ticker, e)
+                return ticker, None, "data unavailable"
+        filing_url = ticker_data.get_latest_filing_url()
+        if not filing_url or filing_url == "N/A":
+            return ticker, None, "no recent filing"
+        return ticker, filing_url, ticker_data.get_previous_close_price()
+
+    async def _extract(self, ticker, filing_url):
+        async with self._semaphore:
+            try:
+                async with open_filing(f"{FILING_BASE_URL}{filing_url}") as (document, size):
+                    # PDF parsing is CPU-bound; keep it off the event loop while other filings download
+                    return await asyncio.to_thread(extract_text_from_pdf, document)
+            except FilingDownloadError as e:
+                logger.warning("Rejected filing for %s: %s", ticker, e)
+            except Exception as e:
+                logger.error("Filing download failed for %s: %s", ticker, e)
+            return None
+
+    @staticmethod
+    def _request(ticker, text, previous_close_price):
+        model = Config.CLAUDE_FAST_MODEL if len(text) <= Config.ANALYSIS_SHORT_CHARS else Config.CLAUDE_DEEP_MODEL
+        questions = [question for _, question in build_questions(previous_close_price)]
+        return model, {
+            "custom_id": ticker,
+            "params": {
+                "model": model,
+                "max_tokens": 4000,
+                "messages": [{"role": "user", "content": build_prompt(ticker, questions, text, True)}],
+            },
+        }
+
+    async def submit_watchlist(self, bot, user_id, chat_id):
+        """
+        Build and submit the batch for one user's watchlist. Returns a summary dict with
+        batch_id (None when nothing needed analyzing), submitted and reused tickers and
+        notes explaining every ticker that was left out. When every readable filing was
+        analyzed before, the digest of stored analyses is sent right away.
+        """
+        tickers = sorted(set(await self.db.get_watched_tickers(user_id)))
+        notes = {}
+        resolved = await asyncio.gather(*(self._resolve(ticker) for ticker in tickers))
+
+        candidates = {}
+        for ticker, filing_url, detail in resolved:
+            if filing_url is None:
+                notes[ticker] = detail
+            else:
+                candidates[ticker] = (filing_url, detail)
+
+        stored = await self.db.get_filing_analyses([url for url, _ in candidates.values()]) if candidates else {}
+        filings = {}
+        for ticker, (filing_url, _) in list(candidates.items()):
+            if filing_url in stored:
+                filings[ticker] = [filing_url, STORED_MODEL]
+                del candidates[ticker]
+        reused = sorted(filings)
+
+        texts = await asyncio.gather(*(self._extract(ticker, url) for ticker, (url, _) in candidates.items()))
+        requests = []
+        for (ticker, (filing_url, previous_close_price)), text in zip(candidates.items(), texts):
+            if not text:
+                notes[ticker] = "filing could not be read"
+                continue
+            model, request = self._request(ticker, text, previous_close_price)
+            requests.append(request)
+            filings[ticker] = [filing_url, model]
+
+        batch_id = None
+        if requests:
+            batch = await self.client.create(requests)
+            batch_id = batch["id"]
+            await self.db.create_analysis_batch(batch_id, user_id, chat_id, filings, notes)
+            logger.info("Submitted batch %s with %s filings for user %s", batch_id, len(requests), user_id)
+        elif reused:
+            await self._send_digest(bot, chat_id, filings, {}, notes)
+        submitted = sorted(ticker for ticker, (_, model) in filings.items() if model != STORED_MODEL)
+        return {"batch_id": batch_id, "submitted": submitted, "reused": reused, "notes": notes}
+
+    async def poll_once(self, bot):
+        for pending in await self.db.get_pending_batches():
+            try:
+                batch = await self.client.retrieve(pending["batch_id"])
+                if batch.get("processing_status") != "ended":
+                    continue
+                await self._deliver(bot, pending, batch)
+            except Exception as e:
+                logger.error("Polling batch %s failed: %s", pending["batch_id"], e)
+
+    async def _deliver(self, bot, pending, batch):
+        results = await self.client.results(batch)
+        await self._send_digest(bot, pending["chat_id"], pending["filings"], results, pending["notes"])
+        await self.db.set_batch_status(pending["batch_id"], "delivered")
+        logger.info("Delivered batch %s digest to user %s", pending["batch_id"], pending["user_id"])
+
+    async def _send_digest(self, bot, chat_id, filings, results, notes):
+        """filings maps ticker -> [filing_url, model]; results maps ticker -> (text, error)"""
+        stored_urls = [filing_url for filing_url, model in filings.values() if model == STORED_MODEL]
+        stored = await self.db.get_filing_analyses(stored_urls) if stored_urls else {}
+        rows, sections, delivered = [], [], 0
+        for ticker, (filing_url, model) in sorted(filings.items()):
+            if model == STORED_MODEL:
+                text = stored.get(filing_url)
+                error = "stored analysis is no longer available"
+                title = f"<b>{ticker}</b> <i>(analyzed earlier)</i>"
+            else:
+                text, error = results.get(ticker, (None, "missing from results"))
+                title = f"<b>{ticker}</b>"
+                if text:
+                    rows.append((filing_url, ticker, model, text))
+            if text:
+                delivered += 1
+                sections.append(f"{title}\n{custom_escape_html(parse_claude_response(text))}")
+            else:
+                sections.append(f"{title}\n<i>Analysis failed: {custom_escape_html(error)}</i>")
+
+        if rows:
+            await self.db.save_filing_analyses(rows)
+        skipped = [f"{ticker}: {reason}" for ticker, reason in sorted(notes.items())]
+        digest = f"<b>📊 Watchlist analysis digest</b> ({delivered} of {len(filings)} filings)\n\n" + "\n\n".join(sections)
+        if skipped:
+            digest += "\n\n<b>Not included</b>\n" + custom_escape_html("\n".join(skipped))
+
+        await message_sender.send_long(bot, chat_id, digest)
+
+    async def run(self, bot):
+        try:
+            await self.setup()
+        except Exception as e:
+            logger.error("Batch analysis setup failed: %s", e)
+            return
+        # Any worker may submit batches; one of them polls and delivers digests
+        await run_as_leader("batch_poller", lambda: self._poll(bot))
+
+    async def _poll(self, bot):
+        while True:
+            try:
+                await self.poll_once(bot)
+            except Exception as e:
+                logger.error("Batch polling cycle failed: %s", e)
+            await asyncio.sleep(self.poll_seconds)
+
+
+batch_analyzer = BatchAnalyzer(db)
@@ -1,23 +1,76 @@
-from typing import List, Tuple
+from typing import AsyncIterator, List, Tuple
+from collections import deque
+from contextlib import aclosing, asynccontextmanager
 import asyncpg
+import json
 import logging
+import time
 from config import Config
 import asyncio
 
 """
 Database access layer - solely responsible for database communication.
-Handles raw database queries and returns raw data.bbb
+Handles raw database queries and returns raw data. One process-wide pool is sized
+from Config; large reads stream through server-side cursors, and pool acquire-wait
+and query-time metrics are collected for /dbstats.
 
 """
 
 logger = logging.getLogger(__name__)
 
+class PoolMetrics:
+    def __init__(self, window=500):
+        self.acquires = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
+        self.queries = 0
+        self.query_errors = 0
+        self.query_time_total = 0.0
+        self._acquire_waits = deque(maxlen=window)
+        self._query_times = deque(maxlen=window)
+
+    def record_acquire(self, seconds):
+        self.acquires += 1
+        self.acquire_wait_total += seconds
+        self.acquire_wait_max = max(self.acquire_wait_max, seconds)
+        self._acquire_waits.append(seconds)
+
+    def record_query(self, logged_query):
+        """asyncpg query logger callback"""
+        self.queries += 1
+        self.query_time_total += logged_query.elapsed
+        self._query_times.append(logged_query.elapsed)
+        if logged_query.exception is not None:
+            self.query_errors += 1
+
+    @staticmethod
+    def _p95(samples):
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def snapshot(self, pool=None):
+        return {
+            "pool_size": pool.get_size() if pool else 0,
+            "pool_idle": pool.get_idle_size() if pool else 0,
+            "acquires": self.acquires,
+            "acquire_wait_avg_ms": self.acquire_wait_total / self.acquires * 1000 if self.acquires else 0.0,
+            "acquire_wait_p95_ms": self._p95(self._acquire_waits) * 1000,
+            "acquire_wait_max_ms": self.acquire_wait_max * 1000,
+            "queries": self.queries,
+            "query_errors": self.query_errors,
+            "query_time_avg_ms": self.query_time_total / self.queries * 1000 if self.queries else 0.0,
+            "query_time_p95_ms": self._p95(self._query_times) * 1000,
+        }
+
 class DataAccess:
     def __init__(self):
         self.pool = None
         self._db_url = Config.DATABASE_URL.replace("postgres://", "postgresql://", 1) if Config.DATABASE_URL else None
         self._lock = asyncio.Lock()
-        logger.info(f"Database URL configured: {'Yes' if self._db_url else 'No'}")
+        self.metrics = PoolMetrics()
+        logger.info("Database URL configured: %s", 'Yes' if self._db_url else 'No')
 
     async def ensure_connection(self):
         """Ensures database connection exists"""
@@ -35,19 +88,47 @@ class DataAccess:
                 logger.info("Creating database pool...")
                 self.pool = await asyncpg.create_pool(
                     self._db_url,
-                    min_size=1,
-                    max_size=10,
-                    command_timeout=60
+                    min_size=Config.DB_POOL_MIN_SIZE,
+                    max_size=Config.DB_POOL_MAX_SIZE,
+                    statement_cache_size=Config.DB_STATEMENT_CACHE_SIZE,
+                    command_timeout=60,
+                    init=self._init_connection
                 )
                 logger.info("Database pool created successfully")
         except Exception as e:
-            logger.error(f"Failed to create database pool: {e}")
+            logger.error("Failed to create database pool: %s", e)
             raise
 
+    async def _init_connection(self, conn):
+        conn.add_query_logger(self.metrics.record_query)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Acquire a pooled connection, recording how long the wait took"""
+        started = time.perf_counter()
+        async with self.pool.acquire() as conn:
+            self.metrics.record_acquire(time.perf_counter() - started)
+            yield conn
+
+    async def iterate(self, query: str, *args, prefetch: int = 100) -> AsyncIterator[asyncpg.Record]:
+        """
+        Stream rows through a server-side cursor instead of materializing them all. The
+        cursor holds a pooled connection until the generator finishes, so callers that may
+        stop early must wrap it in contextlib.aclosing() to return the connection right away.
+        """
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                async for row in conn.cursor(query, *args, prefetch=prefetch):
+                    yield row
+
+    def get_metrics(self) -> dict:
+        return self.metrics.snapshot(self.pool)
+
     async def add_stock_to_watchlist(self, values: dict) -> bool:
         await self.ensure_connection()
         try:
-            async with self.pool.acquire() as conn:
+            async with self.acquire() as conn:
                 await conn.execute('''
                     INSERT INTO stock_info (
                         ticker, user_id, username, date_added, ticker_info,
@@ -71,20 +152,244 @@ class DataAccess:
                 values['latest_news'], values['notes'])
                 return True
         except Exception as e:
-            logger.error(f"Database error in add_stock_to_watchlist: {e}")
+            logger.error("Database error in add_stock_to_watchlist: %s", e)
             return False
 
     async def get_user_watchlist(self, user_id: int) -> List[Tuple[str, str]]:
+        try:
+            async with aclosing(self.iter_user_watchlist(user_id)) as watchlist:
+                return [item async for item in watchlist]
+        except Exception as e:
+            logger.error("Database error in get_user_watchlist: %s", e)
+            return []
+
+    async def iter_user_watchlist(self, user_id: int) -> AsyncIterator[Tuple[str, str]]:
+        """Stream a user's watchlist rows through a server-side cursor (use with aclosing())"""
+        rows = self.iterate('''
+            SELECT ticker, notes 
+            FROM stock_info 
+            WHERE user_id = $1 
+            ORDER BY date_added DESC
+        ''', user_id)
+        async with aclosing(rows):
+            async for row in rows:
+                yield row['ticker'], row['notes']
+
+    async def ensure_alert_schema(self):
+        """Per-ticker state last seen by the alert engine, kept apart from users' watchlist rows"""
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS alert_snapshots (
+                    ticker TEXT PRIMARY KEY,
+                    outstanding_shares BIGINT,
+                    latest_filing_type TEXT,
+                    filing_date TIMESTAMP,
+                    is_caveat_emptor BOOLEAN,
+                    tier TEXT,
+                    checked_at TIMESTAMP NOT NULL DEFAULT now()
+                )
+            ''')
+
+    async def get_watched_snapshots(self) -> List[dict]:
+        """
+        Last alert snapshot per distinct watched ticker, with the users watching it. Tickers
+        never checked before fall back to the values stored with the newest watchlist row.
+        """
         await self.ensure_connection()
         try:
-            async with self.pool.acquire() as conn:
+            async with self.acquire() as conn:
                 rows = await conn.fetch('''
-                    SELECT ticker, notes 
-                    FROM stock_info 
-                    WHERE user_id = $1 
-                    ORDER BY date_added DESC
-                ''', user_id)
-                return [(row['ticker'], row['notes']) for row in rows]
+                    SELECT DISTINCT ON (s.ticker)
+                        s.ticker, w.user_ids, a.tier,
+                        CASE WHEN a.ticker IS NULL THEN s.outstanding_shares ELSE a.outstanding_shares END AS outstanding_shares,
+                        CASE WHEN a.ticker IS NULL THEN s.latest_filing_type ELSE a.latest_filing_type END AS latest_filing_type,
+                        CASE WHEN a.ticker IS NULL THEN s.filing_date ELSE a.filing_date END AS filing_date,
+                        CASE WHEN a.ticker IS NULL THEN s.is_caveat_emptor ELSE a.is_caveat_emptor END AS is_caveat_emptor
+                    FROM stock_info s
+                    JOIN (
+                        SELECT ticker, array_agg(DISTINCT user_id) AS user_ids
+                        FROM stock_info
+                        GROUP BY ticker
+                    ) w ON w.ticker = s.ticker
+                    LEFT JOIN alert_snapshots a ON a.ticker = s.ticker
+                    ORDER BY s.ticker, s.date_added DESC
+                ''')
+                return [dict(row) for row in rows]
         except Exception as e:
-            logger.error(f"Database error in get_user_watchlist: {e}")
+            logger.error("Database error in get_watched_snapshots: %s", e)
             return []
+
+    async def save_alert_snapshot(self, ticker: str, values: dict) -> bool:
+        await self.ensure_connection()
+        try:
+            async with self.acquire() as conn:
+                await conn.execute('''
+                    INSERT INTO alert_snapshots (
+                        ticker, outstanding_shares, latest_filing_type, filing_date, is_caveat_emptor, tier, checked_at
+                    ) VALUES ($1, $2, $3, $4, $5, $6, now())
+                    ON CONFLICT (ticker) DO UPDATE SET
+                        outstanding_shares = EXCLUDED.outstanding_shares,
+                        latest_filing_type = EXCLUDED.latest_filing_type,
+                        filing_date = EXCLUDED.filing_date,
+                        is_caveat_emptor = EXCLUDED.is_caveat_emptor,
+                        tier = EXCLUDED.tier,
+                        checked_at = EXCLUDED.checked_at
+                ''',
+                ticker, values['outstanding_shares'], values['latest_filing_type'],
+                values['filing_date'], values['is_caveat_emptor'], values['tier'])
+                return True
+        except Exception as e:
+            logger.error("Database error in save_alert_snapshot: %s", e)
+            return False
+
+    async def ensure_news_schema(self):
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS otc_news (
+                    id BIGINT PRIMARY KEY,
+                    ticker TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    summary TEXT,
+                    release_date BIGINT NOT NULL,
+                    search TSVECTOR GENERATED ALWAYS AS (
+                        to_tsvector('english', ticker || ' ' || title || ' ' || COALESCE(summary, ''))
+                    ) STORED
+                )
+            ''')
+            await conn.execute('CREATE INDEX IF NOT EXISTS otc_news_search ON otc_news USING GIN (search)')
+            await conn.execute('CREATE INDEX IF NOT EXISTS otc_news_ticker_release ON otc_news (ticker, release_date DESC)')
+
+    async def get_news_cursors(self) -> dict:
+        """Latest ingested (release_date, id) per ticker"""
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT DISTINCT ON (ticker) ticker, release_date, id
+                FROM otc_news
+                ORDER BY ticker, release_date DESC, id DESC
+            ''')
+            return {row['ticker']: (row['release_date'], row['id']) for row in rows}
+
+    async def insert_news_items(self, items: List[tuple]) -> None:
+        """Insert (id, ticker, title, summary, release_date) rows, ignoring ones already stored"""
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            await conn.executemany('''
+                INSERT INTO otc_news (id, ticker, title, summary, release_date)
+                VALUES ($1, $2, $3, $4, $5)
+                ON CONFLICT (id) DO NOTHING
+            ''', items)
+
+    async def get_recent_news(self, ticker: str, limit: int = 5) -> List[dict]:
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT id, title, release_date AS "releaseDate"
+                FROM otc_news
+                WHERE ticker = $1
+                ORDER BY release_date DESC, id DESC
+                LIMIT $2
+            ''', ticker, limit)
+            return [dict(row) for row in rows]
+
+    async def search_news(self, query: str, tickers: List[str] = None, limit: int = 10) -> List[dict]:
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT id, ticker, title, release_date AS "releaseDate",
+                       ts_rank(search, websearch_to_tsquery('english', $1)) AS rank
+                FROM otc_news
+                WHERE search @@ websearch_to_tsquery('english', $1)
+                  AND ($2::text[] IS NULL OR ticker = ANY($2::text[]))
+                ORDER BY rank DESC, release_date DESC, id DESC
+                LIMIT $3
+            ''', query, tickers, limit)
+            return [dict(row) for row in rows]
+
+    async def get_watched_tickers(self, user_id: int = None) -> List[str]:
+        """Distinct watched tickers, for one user or across all users"""
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT DISTINCT ticker FROM stock_info
+                WHERE $1::bigint IS NULL OR user_id = $1::bigint
+            ''', user_id)
+            return [row['ticker'] for row in rows]
+
+    async def ensure_batch_schema(self):
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS filing_analyses (
+                    filing_url TEXT PRIMARY KEY,
+                    ticker TEXT NOT NULL,
+                    model TEXT,
+                    analysis TEXT NOT NULL,
+                    analyzed_at TIMESTAMP NOT NULL DEFAULT now()
+                )
+            ''')
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS analysis_batches (
+                    batch_id TEXT PRIMARY KEY,
+                    user_id BIGINT NOT NULL,
+                    chat_id BIGINT NOT NULL,
+                    filings JSONB NOT NULL,
+                    notes JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    status TEXT NOT NULL DEFAULT 'in_progress',
+                    created_at TIMESTAMP NOT NULL DEFAULT now()
+                )
+            ''')
+
+    async def get_filing_analyses(self, filing_urls: List[str]) -> dict:
+        """Stored analysis text for those of filing_urls that have one"""
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            rows = await conn.fetch('SELECT filing_url, analysis FROM filing_analyses WHERE filing_url = ANY($1::text[])', filing_urls)
+            return {row['filing_url']: row['analysis'] for row in rows}
+
+    async def save_filing_analyses(self, rows: List[tuple]) -> None:
+        """Upsert (filing_url, ticker, model, analysis) rows"""
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            await conn.executemany('''
+                INSERT INTO filing_analyses (filing_url, ticker, model, analysis)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (filing_url) DO UPDATE SET
+                    model = EXCLUDED.model,
+                    analysis = EXCLUDED.analysis,
+                    analyzed_at = now()
+            ''', rows)
+
+    async def create_analysis_batch(self, batch_id: str, user_id: int, chat_id: int, filings: dict, notes: dict) -> None:
+        """filings maps ticker -> [filing_url, model]; notes maps ticker -> reason it was left out"""
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            await conn.execute('''
+                INSERT INTO analysis_batches (batch_id, user_id, chat_id, filings, notes)
+                VALUES ($1, $2, $3, $4::jsonb, $5::jsonb)
+            ''', batch_id, user_id, chat_id, json.dumps(filings), json.dumps(notes))
+
+    async def get_pending_batches(self, user_id: int = None) -> List[dict]:
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT batch_id, user_id, chat_id, filings, notes, created_at
+                FROM analysis_batches
+                WHERE status = 'in_progress' AND ($1::bigint IS NULL OR user_id = $1::bigint)
+                ORDER BY created_at
+            ''', user_id)
+            return [
+                {**dict(row), 'filings': json.loads(row['filings']), 'notes': json.loads(row['notes'])}
+                for row in rows
+            ]
+
+    async def set_batch_status(self, batch_id: str, status: str) -> None:
+        await self.ensure_connection()
+        async with self.acquire() as conn:
+            await conn.execute('UPDATE analysis_batches SET status = $2 WHERE batch_id = $1', batch_id, status)
+
+
+# Process-wide instance so every module shares one connection pool
+db = DataAccess()
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+import numpy as np
+from repos.ticker_repo import ticker_repo
+
+"""
+Dilution analytics module.
+Reads the share-structure history of every watched ticker from the delta-encoded
+ticker snapshot series in a single query, lays it out column-wise and computes OS
+growth, float-to-OS ratios and DTC changes for all tickers in a single vectorized
+NumPy pass. The result is precomputed so /dilution can answer instantly.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+
+def compute_dilution(columns):
+    """
+    Compute per-ticker dilution metrics from column arrays (ticker, os_as_of as epoch
+    seconds, outstanding_shares, float_shares, held_at_dtc). Returns a dict of equally
+    sized arrays, one entry per ticker, sorted by OS growth descending.
+    """
+    tickers = np.asarray(columns.get("ticker", []), dtype=object)
+    if tickers.size == 0:
+        return {key: np.array([]) for key in ("ticker", "first_os", "last_os", "os_growth", "growth_per_30d", "days", "float_ratio", "dtc_change", "observations")}
+
+    as_of = np.asarray(columns["os_as_of"], dtype=np.int64)
+    os_values = np.asarray(columns["outstanding_shares"], dtype=np.float64)
+    float_values = np.asarray(columns["float_shares"], dtype=np.float64)
+    dtc_values = np.asarray(columns["held_at_dtc"], dtype=np.float64)
+
+    names, codes = np.unique(tickers.astype(str), return_inverse=True)
+    order = np.lexsort((as_of, codes))
+    codes, as_of = codes[order], as_of[order]
+    os_values, float_values, dtc_values = os_values[order], float_values[order], dtc_values[order]
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], codes.size] - 1
+
+    first_os, last_os = os_values[starts], os_values[ends]
+    first_dtc, last_dtc = dtc_values[starts], dtc_values[ends]
+    last_float = float_values[ends]
+    days = (as_of[ends] - as_of[starts]) / SECONDS_PER_DAY
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        os_growth = (last_os - first_os) / first_os
+        growth_per_30d = np.where(days > 0, os_growth / days * 30, 0.0)
+        float_ratio = np.where(last_os > 0, last_float / last_os, np.nan)
+        dtc_change = np.where(first_dtc > 0, (last_dtc - first_dtc) / first_dtc, np.nan)
+
+    rank = np.argsort(-np.nan_to_num(os_growth, nan=-np.inf), kind="stable")
+    return {
+        "ticker": names[rank],
+        "first_os": first_os[rank],
+        "last_os": last_os[rank],
+        "os_growth": os_growth[rank],
+        "growth_per_30d": growth_per_30d[rank],
+        "days": days[rank],
+        "float_ratio": float_ratio[rank],
+        "dtc_change": dtc_change[rank],
+        "observations": (ends - starts + 1)[rank],
+    }
+
+
+class DilutionAnalytics:
+    def __init__(self, db=None, repo=None, refresh_minutes=30):
+        self.db = db
+        self.repo = repo or ticker_repo
+        self.refresh_seconds = refresh_minutes * 60
+        self.result = None
+        self.computed_at = None
+
+    async def load_columns(self):
+        """
+        Load the snapshot history of every watched ticker in one query and lay it out as
+        compute_dilution's columns, keeping only observations with a known outstanding
+        share count
+        """
+        history = await self.repo.get_numeric_histories(await self.db.get_watched_tickers())
+        known = np.nan_to_num(history["outstanding_shares"]) > 0
+        return {
+            "ticker": history["ticker"][known],
+            "os_as_of": history["ts"][known],
+            "outstanding_shares": history["outstanding_shares"][known],
+            "float_shares": np.nan_to_num(history["float_shares"][known]),
+            "held_at_dtc": np.nan_to_num(history["dtc_shares"][known]),
+        }
+
+    async def refresh(self):
+        started = time.perf_counter()
+        columns = await self.load_columns()
+        loaded = time.perf_counter()
+        self.result = compute_dilution(columns)
+        self.computed_at = time.time()
+        logger.info(
+            "Loaded %s observations in %.1f ms, computed dilution for %s tickers in %.1f ms",
+            len(columns["ticker"]), (loaded - started) * 1000,
+            len(self.result["ticker"]), (time.perf_counter() - loaded) * 1000,
+        )
+        return self.result
+
+    def top(self, limit=10):
+        """Top diluters among tickers with at least two observations"""
+        if self.result is None:
+            return []
+        mask = (self.result["observations"] > 1) & (self.result["os_growth"] > 0)
+        selected = np.flatnonzero(mask)[:limit]
+        return [{key: values[i] for key, values in self.result.items()} for i in selected]
+
+    async def run(self):
+        if self.db is None or not self.db.pool:
+            logger.info("No database configured, dilution analytics are disabled")
+            return
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Failed to refresh dilution analytics: %s", e)
+            await asyncio.sleep(self.refresh_seconds)
+
+
+dilution_analytics = DilutionAnalytics()
@@ -0,0 +1,128 @@
+import aiohttp
+import asyncio
+import logging
+import mmap
+import tempfile
+from contextlib import asynccontextmanager
+from config import Config
+
+"""
+Filing download module.
+Streams filing documents in chunks into a spooled temporary file instead of reading
+the whole response into memory. Small filings stay in memory, larger ones roll over
+to disk and are handed to the parser as a read-only memory map, so peak memory per
+analysis stays bounded whatever the filing size. Downloads are capped in size,
+checked for a PDF content type and resumed with Range requests when the connection
+drops mid-body.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    # Range offsets must refer to the bytes we store, so ask for the document unencoded
+    "Accept-Encoding": "identity",
+}
+ACCEPTED_CONTENT_TYPES = ("application/pdf", "application/octet-stream", "binary/octet-stream", "application/x-pdf")
+CHUNK_SIZE = 64 * 1024
+# No total limit for large documents, but a stalled read still fails and gets resumed
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=15, sock_read=30)
+
+_session = None
+
+
+class FilingDownloadError(Exception):
+    """Raised when a filing cannot be downloaded or is not an acceptable document"""
+
+
+def get_session():
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(headers=HEADERS, timeout=DOWNLOAD_TIMEOUT)
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _megabytes(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def _check_headers(response, max_bytes, resumed_from):
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type and content_type not in ACCEPTED_CONTENT_TYPES:
+        raise FilingDownloadError(f"Unexpected content type {content_type}")
+    length = response.content_length
+    if length is not None and resumed_from + length > max_bytes:
+        raise FilingDownloadError(f"Filing is {_megabytes(resumed_from + length)}, above the {_megabytes(max_bytes)} limit")
+
+
+async def download(url, target, max_bytes=None):
+    """
+    Stream url into the writable binary file target. Returns the number of bytes written.
+    A dropped connection is resumed from the last written byte when the server honours
+    Range (206); otherwise the download restarts from the beginning.
+    """
+    max_bytes = max_bytes or Config.FILING_MAX_BYTES
+    session = get_session()
+    written = 0
+    validator = None
+
+    for attempt in range(Config.FILING_RESUME_ATTEMPTS + 1):
+        headers = {}
+        if written:
+            headers["Range"] = f"bytes={written}-"
+            if validator:
+                headers["If-Range"] = validator
+        try:
+            async with session.get(url, headers=headers) as response:
+                response.raise_for_status()
+                if written and response.status != 206:
+                    logger.info("Server ignored Range for %s, restarting download", url)
+                    target.seek(0)
+                    target.truncate()
+                    written = 0
+                _check_headers(response, max_bytes, written)
+                validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    if not written and not chunk.lstrip().startswith(b"%PDF"):
+                        raise FilingDownloadError("Response is not a PDF document")
+                    written += len(chunk)
+                    if written > max_bytes:
+                        raise FilingDownloadError(f"Filing exceeds the {_megabytes(max_bytes)} limit")
+                    target.write(chunk)
+                return written
+        except (aiohttp.ClientPayloadError, aiohttp.ServerDisconnectedError, aiohttp.ClientOSError, asyncio.TimeoutError) as e:
+            if attempt == Config.FILING_RESUME_ATTEMPTS:
+                raise
+            logger.warning("Filing download interrupted at %s bytes (%s), resuming", written, e)
+            await asyncio.sleep(min(2 ** attempt, 8))
+
+
+@asynccontextmanager
+async def open_filing(url, max_bytes=None):
+    """
+    Download url and yield (document, size), where document is a seekable binary
+    file-like object ready for the PDF parser. Temporary storage is released on exit.
+    """
+    spool_limit = Config.FILING_SPOOL_BYTES
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_limit)
+    try:
+        size = await download(url, spool, max_bytes)
+        spool.flush()
+        spool.seek(0)
+        if size > spool_limit:
+            # Rolled over to disk: let the OS page the file in instead of copying it into memory
+            with mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                yield view, size
+        else:
+            yield spool, size
+    finally:
+        spool.close()
@@ -1,27 +1,38 @@
-import gspread
-from google.oauth2.service_account import Credentials
+import logging
 from config import Config
 
 """
 Google Sheets integration module.
 Handles all interactions with Google Sheets API for storing and retrieving
-watchlist data and other persistent storage needs.
+watchlist data and other persistent storage needs. The client authenticates and
+opens the sheet on first use rather than at import time.
 
 """
 
+logger = logging.getLogger(__name__)
+
 scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-creds = Credentials.from_service_account_file(Config.GOOGLE_APPLICATION_CREDENTIALS, scopes=scope)
-client = gspread.authorize(creds)
-sheet = client.open_by_key(Config.WATCHLIST_SHEET_ID).sheet1
+_sheet = None
+
+def get_sheet():
+    global _sheet
+    if _sheet is None:
+        import gspread
+        from google.oauth2.service_account import Credentials
+        creds = Credentials.from_service_account_file(Config.GOOGLE_APPLICATION_CREDENTIALS, scopes=scope)
+        client = gspread.authorize(creds)
+        _sheet = client.open_by_key(Config.WATCHLIST_SHEET_ID).sheet1
+    return _sheet
 
 async def get_watchlist_from_sheet(user_id):
     try:
+        sheet = get_sheet()
         cell_list = sheet.findall(str(user_id), in_column=2)
         watchlist = [(sheet.cell(cell.row, 1).value, sheet.cell(cell.row, 20).value) for cell in cell_list]
         return watchlist
     except Exception as e:
-        logger.error(f"Error fetching watchlist: {str(e)}")
+        logger.error("Error fetching watchlist: %s", e)
         return []
 
 async def add_to_sheet(row_data):
-    sheet.append_row(row_data)
\ No newline at end of file
+    get_sheet().append_row(row_data)
@@ -0,0 +1,188 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from config import Config
+
+"""
+Heavy job scheduling module.
+Runs expensive work (Claude analyses, Scrapfly browser scrapes) through weighted fair
+queueing across users. Each job gets a virtual finish tag of
+max(virtual time, user's last tag) + cost / weight, so a user with a long batch only
+delays others by their fair share while an occasional user goes straight to the
+front. Weights come from JOB_USER_WEIGHTS. Concurrency is capped per user and per
+provider, cost is accounted per user, callers are told their queue position as it
+changes and the p95 queue wait is reported in /dbstats.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a user already has the maximum number of jobs queued"""
+
+
+class _Job:
+    __slots__ = ("seq", "user_id", "provider", "factory", "cost", "finish", "future", "on_position", "position", "queued_at")
+
+    def __init__(self, seq, user_id, provider, factory, cost, finish, on_position):
+        self.seq = seq
+        self.user_id = user_id
+        self.provider = provider
+        self.factory = factory
+        self.cost = cost
+        self.finish = finish
+        self.future = asyncio.get_running_loop().create_future()
+        self.on_position = on_position
+        self.position = None
+        self.queued_at = time.monotonic()
+
+
+class JobScheduler:
+    def __init__(self, provider_limits=None, per_user_limit=None, max_queued_per_user=None, weights=None):
+        self.provider_limits = provider_limits or {
+            "claude": Config.CLAUDE_CONCURRENCY,
+            "scrapfly": Config.SCRAPFLY_CONCURRENCY,
+        }
+        self.per_user_limit = per_user_limit or Config.JOBS_PER_USER
+        self.max_queued_per_user = max_queued_per_user or Config.MAX_QUEUED_JOBS_PER_USER
+        self.weights = {}
+        self.usage = {}
+        self._queues = {}
+        self._last_finish = {}
+        self._running_by_user = {}
+        self._running_by_provider = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._tasks = set()
+        self._waits = deque(maxlen=500)
+        for user_id, weight in (Config.JOB_USER_WEIGHTS if weights is None else weights).items():
+            self.set_weight(user_id, weight)
+
+    def set_weight(self, user_id, weight):
+        if weight <= 0:
+            raise ValueError(f"Job weight for user {user_id} must be positive, got {weight}")
+        self.weights[user_id] = weight
+
+    def get_usage(self, user_id):
+        return self.usage.get(user_id, {"jobs": 0, "cost": 0.0})
+
+    def submit(self, user_id, provider, factory, cost=1.0, on_position=None):
+        """
+        Queue factory() (a zero-argument coroutine function) for user_id on provider.
+        Returns a future with the job's result. on_position, if given, is an async
+        callable receiving the 1-based queue position whenever it changes.
+        """
+        queue = self._queues.setdefault(user_id, deque())
+        if len(queue) >= self.max_queued_per_user:
+            raise QueueFullError(f"User {user_id} already has {len(queue)} jobs queued")
+
+        weight = self.weights.get(user_id, 1.0)
+        start = max(self._virtual_time, self._last_finish.get(user_id, 0.0))
+        finish = start + cost / weight
+        self._last_finish[user_id] = finish
+
+        job = _Job(next(self._seq), user_id, provider, factory, cost, finish, on_position)
+        queue.append(job)
+        self._dispatch()
+        return job.future
+
+    def _queued_jobs(self):
+        return [job for queue in self._queues.values() for job in queue]
+
+    @staticmethod
+    def _heads(queue):
+        """
+        The oldest job per provider in one user's queue: a user's jobs for a provider run
+        in order, but a job waiting on one provider's cap does not hold up the others
+        """
+        heads = {}
+        for job in queue:
+            heads.setdefault(job.provider, job)
+        return heads.values()
+
+    def _can_run(self, job):
+        if self._running_by_user.get(job.user_id, 0) >= self.per_user_limit:
+            return False
+        limit = self.provider_limits.get(job.provider)
+        return limit is None or self._running_by_provider.get(job.provider, 0) < limit
+
+    def _dispatch(self):
+        while True:
+            heads = [job for queue in self._queues.values() for job in self._heads(queue) if self._can_run(job)]
+            if not heads:
+                break
+            job = min(heads, key=lambda j: (j.finish, j.seq))
+            self._queues[job.user_id].remove(job)
+            self._virtual_time = max(self._virtual_time, job.finish - job.cost / self.weights.get(job.user_id, 1.0))
+            self._start(job)
+        self._publish_positions()
+
+    def _start(self, job):
+        self._running_by_user[job.user_id] = self._running_by_user.get(job.user_id, 0) + 1
+        self._running_by_provider[job.provider] = self._running_by_provider.get(job.provider, 0) + 1
+        self._waits.append(time.monotonic() - job.queued_at)
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job):
+        try:
+            result = await job.factory()
+            if not job.future.done():
+                job.future.set_result(result)
+        except Exception as e:
+            logger.error("%s job for user %s failed: %s", job.provider, job.user_id, e)
+            if not job.future.done():
+                job.future.set_exception(e)
+                job.future.exception()
+        finally:
+            self._running_by_user[job.user_id] -= 1
+            self._running_by_provider[job.provider] -= 1
+            usage = self.usage.setdefault(job.user_id, {"jobs": 0, "cost": 0.0})
+            usage["jobs"] += 1
+            usage["cost"] += job.cost
+            if not self._queues.get(job.user_id):
+                self._queues.pop(job.user_id, None)
+            self._dispatch()
+
+    def _publish_positions(self):
+        by_provider = {}
+        for job in self._queued_jobs():
+            by_provider.setdefault(job.provider, []).append(job)
+        for jobs in by_provider.values():
+            jobs.sort(key=lambda j: (j.finish, j.seq))
+            for position, job in enumerate(jobs, start=1):
+                if job.on_position and job.position != position:
+                    job.position = position
+                    task = asyncio.create_task(self._notify(job, position))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _notify(job, position):
+        try:
+            await job.on_position(position)
+        except Exception as e:
+            logger.debug("Queue position update failed: %s", e)
+
+    def wait_p95(self):
+        if not self._waits:
+            return 0.0
+        ordered = sorted(self._waits)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def summary(self):
+        """Queue metrics for /dbstats"""
+        stats = {
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "wait_p95_s": self.wait_p95(),
+        }
+        for provider, running in sorted(self._running_by_provider.items()):
+            stats[f"running_{provider}"] = running
+        return stats
+
+
+job_scheduler = JobScheduler()
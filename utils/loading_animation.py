@@ -1,6 +1,5 @@
 import asyncio
 from telegram import Message
-from telegram.ext import ContextTypes
 
 """
 UI feedback module.
@@ -9,10 +8,11 @@ Telegram messages.
 
 """
 
-async def loading_animation(message: Message, text: str, context: ContextTypes.DEFAULT_TYPE):
+async def loading_animation(message: Message, text: str, done: asyncio.Event):
+    """Animate message until done is set; each job passes its own event"""
     animation = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
     i = 0
-    while context.user_data.get('loading', True):
+    while not done.is_set():
         try:
             await message.edit_text(f"{animation[i]} {text}")
             await asyncio.sleep(0.1)
@@ -0,0 +1,159 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import reprlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from config import Config
+
+"""
+Logging pipeline module.
+Routes every log record through a bounded in-memory queue to a background listener
+thread, so formatting and stream I/O stay off the event loop. Modules log with %-style
+arguments so nothing is formatted for disabled levels, wrap large payloads in capped()
+so enabled debug logging stays bounded, and can be sampled per logger. Output is plain
+text by default or one JSON object per line with LOG_JSON.
+
+"""
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None
+_traceback_formatter = logging.Formatter()
+
+
+class capped:
+    """
+    Log argument that renders at most `limit` characters of a payload, and only when
+    the record is actually emitted. Containers are rendered with a bounded repr so a
+    large profile dict is never fully stringified just to be truncated.
+    """
+    __slots__ = ("value", "limit")
+
+    _repr = reprlib.Repr()
+    _repr.maxlevel = 3
+    _repr.maxdict = 12
+    _repr.maxlist = 12
+    _repr.maxstring = 120
+    _repr.maxother = 120
+
+    def __init__(self, value, limit=None):
+        self.value = value
+        self.limit = limit or Config.LOG_PAYLOAD_LIMIT
+
+    def __str__(self):
+        text = self.value if isinstance(self.value, str) else self._repr.repr(self.value)
+        if len(text) > self.limit:
+            return f"{text[:self.limit]}... [{len(text)} chars]"
+        return text
+
+    __repr__ = __str__
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of records below WARNING for the configured loggers.
+    Rates are matched on the longest dotted logger-name prefix, e.g. "handlers" covers
+    "handlers.info" unless "handlers.info" has its own rate.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates)
+
+    def _rate_for(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking or erroring when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Merge args now so the writer thread never touches objects the event loop may mutate,
+        # but keep the traceback separate so the JSON formatter can emit it as its own field
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level=None, json_output=None, sample_rates=None, queue_size=None):
+    """
+    Replace the root handlers with a queue handler feeding a background stream writer.
+    Safe to call more than once; the previous listener is stopped first.
+    """
+    global _listener
+    level = level or Config.LOG_LEVEL
+    json_output = Config.LOG_JSON if json_output is None else json_output
+    sample_rates = Config.LOG_SAMPLE_RATES if sample_rates is None else sample_rates
+
+    stop_logging()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter() if json_output else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.Queue(maxsize=queue_size or Config.LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rates))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return queue_handler
+
+
+def stop_logging():
+    """Flush queued records and stop the background writer"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from telegram.constants import ParseMode
+from telegram.error import RetryAfter
+
+"""
+Outbound message pipeline module.
+Splits long HTML replies on paragraph, line and word boundaries without breaking tags
+or entities, and schedules sends through per-chat and global token buckets so replies
+go out as fast as Telegram's flood limits allow. RetryAfter responses are retried
+after the delay Telegram asks for.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LENGTH = 4000
+# Below this much room per chunk, the remaining formatting is dropped instead of split further
+MIN_CHUNK_BUDGET = 200
+
+TAG_PATTERN = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9-]*)[^>]*>")
+
+
+def _open_tags(html):
+    """Return the opening tags still unclosed at the end of html, outermost first"""
+    stack = []
+    for match in TAG_PATTERN.finditer(html):
+        closing, name = match.group(1), match.group(2).lower()
+        if closing:
+            for i in range(len(stack) - 1, -1, -1):
+                if stack[i][0] == name:
+                    del stack[i:]
+                    break
+        else:
+            stack.append((name, match.group(0)))
+    return stack
+
+
+def _safe_cut(text, cut):
+    """Move cut back so it does not land inside a tag or an HTML entity"""
+    tag_start = text.rfind("<", 0, cut)
+    if tag_start != -1 and text.rfind(">", 0, cut) < tag_start:
+        cut = tag_start
+    entity_start = text.rfind("&", 0, cut)
+    if entity_start != -1 and ";" not in text[entity_start:cut] and cut - entity_start <= 10:
+        cut = entity_start
+    return cut
+
+
+def _drop_leading_tag(text):
+    """
+    Remove the tag text starts with, plus the matching closing tag for an opening one,
+    keeping the enclosed text. Used for tags too long to fit in any chunk (e.g. a huge href).
+    """
+    match = TAG_PATTERN.match(text)
+    if match is None:
+        # A stray "<" that is not a tag: escape it so it can be cut like text
+        return "&lt;" + text[1:]
+    closing, name = match.group(1), match.group(2).lower()
+    if closing:
+        return f"</{name}>" + text[match.end():]
+    depth = 0
+    for inner in TAG_PATTERN.finditer(text, match.end()):
+        if inner.group(2).lower() != name:
+            continue
+        if not inner.group(1):
+            depth += 1
+        elif depth:
+            depth -= 1
+        else:
+            return text[match.end():inner.start()] + text[inner.end():]
+    return text[match.end():]
+
+
+def split_html(text, limit=MAX_MESSAGE_LENGTH):
+    """Split HTML text into chunks of at most limit characters that are each valid HTML"""
+    chunks = []
+    prefix = ""
+    remaining = text
+    # Room left for the closing tags appended to each chunk
+    reserve = 64
+    while len(prefix) + len(remaining) > limit:
+        budget = limit - len(prefix) - reserve
+        if budget < MIN_CHUNK_BUDGET:
+            # Pathologically deep nesting: send the rest as plain text rather than overflow
+            remaining, prefix, reserve = TAG_PATTERN.sub("", prefix + remaining), "", 64
+            continue
+        window = remaining[:budget]
+        cut = -1
+        for separator in ("\n\n", "\n", " "):
+            position = window.rfind(separator)
+            if position > budget // 2:
+                cut = position + len(separator)
+                break
+        if cut == -1:
+            cut = budget
+        cut = _safe_cut(remaining, cut)
+        if cut <= 0:
+            # Never cut inside a tag: one that alone exceeds the budget is dropped instead
+            remaining = _drop_leading_tag(remaining)
+            continue
+
+        body = prefix + remaining[:cut]
+        open_tags = _open_tags(body)
+        closing = "".join(f"</{name}>" for name, _ in reversed(open_tags))
+        if len(body.rstrip()) + len(closing) > limit:
+            reserve = len(closing)
+            continue
+        chunks.append(body.rstrip() + closing)
+        prefix = "".join(tag for _, tag in open_tags)
+        remaining = remaining[cut:].lstrip("\n")
+        reserve = 64
+
+    if remaining.strip():
+        chunks.append(prefix + remaining)
+    return chunks
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def try_acquire(self):
+        """Take a token if one is available right now, without waiting"""
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def pause(self, seconds):
+        """Drain the bucket so nothing is sent for the given number of seconds"""
+        self.tokens = -seconds * self.rate
+        self.updated = time.monotonic()
+
+
+class MessageSender:
+    # Telegram allows roughly 30 messages/s overall, ~1/s per private chat and 20/min per group
+    def __init__(self, global_rate=30, private_rate=1, group_rate=20 / 60, max_chats=10000, max_attempts=5):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.max_chats = max_chats
+        self.max_attempts = max_attempts
+        self._chat_buckets = OrderedDict()
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            rate = self.group_rate if chat_id < 0 else self.private_rate
+            bucket = TokenBucket(rate, 3)
+            self._chat_buckets[chat_id] = bucket
+            while len(self._chat_buckets) > self.max_chats:
+                self._chat_buckets.popitem(last=False)
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    async def send(self, bot, chat_id, text, **kwargs):
+        chat_bucket = self._chat_bucket(chat_id)
+        for attempt in range(self.max_attempts):
+            await chat_bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                return await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            except RetryAfter as e:
+                delay = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+                logger.warning("Flood control for chat %s, retrying in %ss (attempt %s)", chat_id, delay, attempt + 1)
+                chat_bucket.pause(delay)
+                if attempt == self.max_attempts - 1:
+                    raise
+
+    async def send_long(self, bot, chat_id, text, parse_mode=ParseMode.HTML, **kwargs):
+        """Split text into valid HTML chunks and send them in order"""
+        messages = []
+        for chunk in split_html(text):
+            messages.append(await self.send(bot, chat_id, chunk, parse_mode=parse_mode, **kwargs))
+        return messages
+
+
+message_sender = MessageSender()
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from api.otc_markets import get_news_data
+from config import Config
+from models.ticker_data import TickerData
+from utils.data_access import db
+from utils.message_sender import TokenBucket
+from utils.shared_state import get_backend, run_as_leader
+
+"""
+News ingestion module.
+Polls OTC Markets news incrementally per ticker, paging only until it reaches the last
+(releaseDate, id) already stored, and keeps every item in Postgres behind a tsvector
+full-text index. /info reads recent news from the store and /news searches it. Workers
+that are not polling queue the tickers they serve for the polling worker and only fetch
+live, rate-limited, when nothing is stored for a ticker yet.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 20
+MAX_PAGES = 5
+# Shared hash of tickers /info served that the poller should ingest next
+REQUESTED_KEY = "news:requested"
+REQUESTED_POLL_SECONDS = 30
+
+
+def _news_rows(ticker, records):
+    return [
+        (int(item['id']), ticker, item.get('title') or '', item.get('summary'), int(item['releaseDate']))
+        for item in records
+        if item.get('id') is not None and item.get('releaseDate') is not None
+    ]
+
+
+class NewsIngester:
+    def __init__(self, db, interval_minutes=None, concurrency=3, fresh_minutes=30):
+        self.db = db
+        self.interval = (interval_minutes or Config.NEWS_POLL_MINUTES) * 60
+        self.fresh_seconds = fresh_minutes * 60
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._cursors = {}
+        self._ingested_at = {}
+        self._requested_at = {}
+        self._live_bucket = TokenBucket(Config.NEWS_LIVE_FETCHES_PER_MINUTE / 60, Config.NEWS_LIVE_FETCHES_PER_MINUTE)
+        self.ready = False
+
+    async def setup(self):
+        await self.db.ensure_news_schema()
+        self._cursors = await self.db.get_news_cursors()
+        self.ready = True
+
+    async def ingest(self, ticker, first_page=None):
+        """Fetch news newer than the stored cursor for ticker; returns the number of new items"""
+        ticker = ticker.upper()
+        # (release_date, id) keyset: several items can share one releaseDate
+        cursor = self._cursors.get(ticker)
+        new_rows = []
+        for page in range(1, MAX_PAGES + 1):
+            if page == 1 and first_page is not None:
+                news = first_page
+            else:
+                news = await get_news_data(ticker, page=page, page_size=PAGE_SIZE)
+            records = news.get('records', []) if isinstance(news, dict) else []
+            rows = [row for row in _news_rows(ticker, records) if cursor is None or (row[4], row[0]) > cursor]
+            new_rows.extend(rows)
+            # Results are sorted newest first, so an already-seen item means we have caught up;
+            # a ticker's first ingest only takes the latest page
+            if len(rows) < len(records) or len(records) < PAGE_SIZE or cursor is None:
+                break
+
+        if new_rows:
+            await self.db.insert_news_items(new_rows)
+            self._cursors[ticker] = max((row[4], row[0]) for row in new_rows)
+        self._ingested_at[ticker] = time.monotonic()
+        return len(new_rows)
+
+    async def get_news(self, ticker, limit=5):
+        """News for /info in the OTC response shape, served from the store"""
+        ticker = ticker.upper()
+        if not self.ready:
+            return await get_news_data(ticker)
+
+        records = await self.db.get_recent_news(ticker, limit)
+        if not records and not self._recently_ingested(ticker) and self._live_bucket.try_acquire():
+            # Nothing stored yet: fetch once live and keep it, so later reads hit the store
+            live = await get_news_data(ticker, page_size=PAGE_SIZE)
+            try:
+                await self.ingest(ticker, first_page=live)
+            except Exception as e:
+                logger.error("Failed to store news for %s: %s", ticker, e)
+                return live
+            records = await self.db.get_recent_news(ticker, limit)
+        elif not self._recently_ingested(ticker):
+            await self._request(ticker)
+
+        for record in records:
+            record['displayDateTime'] = datetime.fromtimestamp(record['releaseDate'] / 1000).strftime('%m/%d/%Y %H:%M')
+        return {'records': records}
+
+    def _recently_ingested(self, ticker):
+        ingested_at = self._ingested_at.get(ticker)
+        return ingested_at is not None and time.monotonic() - ingested_at <= self.fresh_seconds
+
+    async def _request(self, ticker):
+        """Queue ticker for the polling worker, at most once per freshness window per worker"""
+        requested_at = self._requested_at.get(ticker)
+        if requested_at is not None and time.monotonic() - requested_at <= self.fresh_seconds:
+            return
+        self._requested_at[ticker] = time.monotonic()
+        try:
+            await get_backend().hset(REQUESTED_KEY, ticker, time.time())
+        except Exception as e:
+            logger.warning("Could not queue news refresh for %s: %s", ticker, e)
+
+    async def ingest_requested(self):
+        """Ingest the tickers other workers queued since the last drain"""
+        backend = get_backend()
+        requested = await backend.hgetall(REQUESTED_KEY)
+        for ticker in requested:
+            await backend.hdel(REQUESTED_KEY, ticker)
+        tickers = [ticker for ticker in requested if not self._recently_ingested(ticker)]
+        if tickers:
+            counts = await asyncio.gather(*(self._ingest_guarded(t) for t in tickers))
+            logger.info("Ingested %s news items for %s requested tickers", sum(counts), len(tickers))
+
+    async def search(self, query, tickers=None, limit=10):
+        """Full-text search over the stored news, or None while the store is unavailable"""
+        if not self.ready:
+            return None
+        return await self.db.search_news(query, tickers, limit)
+
+    async def _ingest_guarded(self, ticker):
+        async with self._semaphore:
+            try:
+                return await self.ingest(ticker)
+            except Exception as e:
+                logger.warning("News ingestion failed for %s: %s", ticker, e)
+                return 0
+
+    async def run_cycle(self):
+        tickers = set(await self.db.get_watched_tickers()) | {ticker for ticker, _ in TickerData.items()}
+        counts = await asyncio.gather(*(self._ingest_guarded(t) for t in tickers))
+        logger.info("Ingested %s news items across %s tickers", sum(counts), len(tickers))
+
+    async def run(self):
+        try:
+            await self.setup()
+        except Exception as e:
+            logger.error("News store setup failed, /info keeps using live news: %s", e)
+            return
+        # Every worker serves reads from the store; only one keeps ingesting into it
+        await run_as_leader("news_ingester", self._poll)
+
+    async def _poll(self):
+        next_cycle = 0
+        while True:
+            try:
+                if time.monotonic() >= next_cycle:
+                    next_cycle = time.monotonic() + self.interval
+                    await self.run_cycle()
+                else:
+                    await self.ingest_requested()
+            except Exception as e:
+                logger.error("News ingestion cycle failed: %s", e)
+            await asyncio.sleep(min(REQUESTED_POLL_SECONDS, max(0, next_cycle - time.monotonic())))
+
+
+news_ingester = NewsIngester(db)
@@ -1,5 +1,6 @@
 import re
 import logging
+from utils.log_setup import capped
 
 """
 Response parsing module.
@@ -33,6 +34,6 @@ def parse_claude_response(response):
     formatted_text = "\n\n".join(paragraph.strip() for paragraph in paragraphs)
     
     # Debug log at the end of the function
-    logger.debug(f"Formatted response: {formatted_text[:500]}...")  # Log first 500 characters
+    logger.debug("Formatted response: %s", capped(formatted_text))
     
     return formatted_text
\ No newline at end of file
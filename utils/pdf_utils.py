@@ -1,27 +1,164 @@
-import PyPDF2
 import io
 import logging
+import re
+import time
+from config import Config
 
 """
 PDF processing utilities module.
 Provides functionality for extracting text content from PDF files,
-particularly for financial reports and documents.
+particularly for financial reports and documents. Long filings are extracted
+selectively: a cheap scan of each page's raw content stream scores it against
+financial section keywords, and full text extraction runs only on the best pages
+and their neighbours until the character or page budget is met.
 
 """
 
 
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(pdf_content):
+# Keywords are matched against lowercased page text with all whitespace removed
+SECTION_KEYWORDS = {
+    "balancesheet": 5,
+    "totalassets": 4,
+    "convertiblenote": 5,
+    "convertible": 2,
+    "notespayable": 3,
+    "stockholders'equity": 4,
+    "stockholders'deficit": 4,
+    "shareholders'equity": 4,
+    "shareholders'deficit": 4,
+    "subsequentevent": 5,
+    "goingconcern": 4,
+    "sharesoutstanding": 3,
+    "outstandingshares": 3,
+    "sharesissued": 2,
+    "authorizedshares": 2,
+    "reversesplit": 4,
+    "shellcompany": 4,
+    "natureofbusiness": 3,
+    "descriptionofbusiness": 3,
+    "organization": 1,
+    "planofoperation": 3,
+    "merger": 2,
+    "acquisition": 2,
+    "dilution": 2,
+}
+
+# Pages dominated by these are boilerplate even when they mention a keyword in passing
+SKIP_KEYWORDS = (
+    "pursuanttotherequirementsof",
+    "certificationpursuantto",
+    "section302",
+    "section906",
+    "exhibitindex",
+    "indextoexhibits",
+)
+
+_LITERAL_STRING = re.compile(rb"\((?:\\.|[^\\)])*\)", re.S)
+_WHITESPACE = re.compile(r"\s+")
+# Raw content streams with fewer literal characters than this use hex/CID-encoded fonts
+MIN_RAW_CHARS = 40
+
+
+def _normalize(text):
+    return _WHITESPACE.sub("", text.lower()).replace("’", "'")
+
+
+def _raw_page_text(page):
+    """Concatenate literal strings from the page's content stream without parsing fonts"""
+    contents = page.get_contents()
+    if contents is None:
+        return ""
+    data = contents.get_data()
+    return b"".join(match[1:-1] for match in _LITERAL_STRING.findall(data)).replace(b"\\", b"").decode("latin-1")
+
+
+def _score(normalized):
+    if any(keyword in normalized for keyword in SKIP_KEYWORDS) and len(normalized) < 3000:
+        return 0
+    return sum(weight for keyword, weight in SECTION_KEYWORDS.items() if keyword in normalized)
+
+
+def _scan(pages):
+    """
+    Score every page. Returns (scores, extracted) where extracted holds full text for
+    pages whose raw stream was unreadable and therefore had to be extracted to be scanned.
+    """
+    scores, extracted = [], {}
+    for index, page in enumerate(pages):
+        try:
+            raw = _raw_page_text(page)
+        except Exception:
+            raw = ""
+        if len(raw) < MIN_RAW_CHARS:
+            extracted[index] = page.extract_text() or ""
+            raw = extracted[index]
+        scores.append(_score(_normalize(raw)))
+    return scores, extracted
+
+
+def select_pages(scores, max_pages=None, neighbours=1):
+    """
+    Page indexes to extract as (document order, priority order): the first page (cover
+    and business description) plus each relevant page and its neighbours, taken
+    best-first until max_pages is reached. With no relevant page at all, every page is
+    kept in document order and the character budget decides where to stop.
+    """
+    if not any(scores):
+        return list(range(len(scores))), list(range(len(scores)))
+    max_pages = max_pages or Config.PDF_MAX_PAGES
+    selected = {0}
+    for index in sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: (-scores[i], i)):
+        if len(selected) >= max_pages:
+            break
+        for candidate in range(index - neighbours, index + neighbours + 1):
+            if 0 <= candidate < len(scores) and len(selected) < max_pages:
+                selected.add(candidate)
+    return sorted(selected), sorted(selected, key=lambda i: (-scores[i], i))
+
+
+def extract_text_from_pdf(pdf_content, selective=None, char_budget=None, max_pages=None):
+    """pdf_content is either the raw bytes or a seekable binary file-like object (e.g. a memory map)"""
+    # Imported lazily: most updates never reach the analysis path
+    import PyPDF2
+
+    selective = Config.PDF_SELECTIVE if selective is None else selective
+    char_budget = char_budget or Config.PDF_TEXT_BUDGET
+
     try:
-        reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() or ""
+        started = time.perf_counter()
+        source = io.BytesIO(pdf_content) if isinstance(pdf_content, (bytes, bytearray)) else pdf_content
+        reader = PyPDF2.PdfReader(source)
+        pages = reader.pages
+        page_count = len(pages)
+
+        if not selective or page_count <= Config.PDF_FULL_EXTRACT_PAGES:
+            text = ""
+            for page in pages:
+                text += page.extract_text() or ""
+        else:
+            scores, extracted = _scan(pages)
+            in_order, by_priority = select_pages(scores, max_pages)
+            texts, used = {}, 0
+            # Best pages first, so the budget is spent on balance sheets and notes rather than the tail
+            for index in by_priority:
+                if used >= char_budget:
+                    break
+                if index not in extracted:
+                    extracted[index] = pages[index].extract_text() or ""
+                texts[index] = extracted[index]
+                used += len(texts[index])
+            text = "\n".join(f"[Page {index + 1}]\n{texts[index]}" for index in in_order if texts.get(index))
+            logger.info(
+                "Selected %s of %s pages (%s chars) in %.0f ms",
+                len(texts), page_count, used, (time.perf_counter() - started) * 1000,
+            )
+
         if not text.strip():
             logger.warning("Extracted text is empty")
             return None
         return text
     except Exception as e:
-        logger.error(f"Error extracting text from PDF: {e}")
-        return None
\ No newline at end of file
+        logger.error("Error extracting text from PDF: %s", e)
+        return None
@@ -1,9 +1,12 @@
+import asyncio
 import time
+from utils.shared_state import get_backend
 
 """
 Rate limiting implementation module.
 Provides rate limiting functionality to prevent API abuse and ensure
-compliance with external service limits.
+compliance with external service limits. When a shared-state backend is configured
+the budget is counted there so it holds across all bot workers.
 
 """
 
@@ -21,9 +24,35 @@ class RateLimiter:
             return True
         return False
 
+class SharedRateLimiter:
+    """Fixed-window limiter whose counter lives in the shared-state backend, so the
+    budget is enforced across all workers rather than per process."""
+
+    def __init__(self, name, max_calls, time_frame, backend):
+        self.name = name
+        self.max_calls = max_calls
+        self.time_frame = time_frame
+        self.backend = backend
+
+    async def try_acquire(self):
+        window = int(time.time() // self.time_frame)
+        key = f"ratelimit:{self.name}:{window}"
+        count = await self.backend.incr(key, ttl=max(1, int(self.time_frame * 2)))
+        return count <= self.max_calls
+
+async def acquire_slot():
+    backend = get_backend()
+    if backend.is_shared:
+        global shared_rate_limiter
+        if shared_rate_limiter is None:
+            shared_rate_limiter = SharedRateLimiter("otc", rate_limiter.max_calls, rate_limiter.time_frame, backend)
+        return await shared_rate_limiter.try_acquire()
+    return rate_limiter.try_acquire()
+
 async def rate_limited_request(method, *args, **kwargs):
-    while not rate_limiter.try_acquire():
+    while not await acquire_slot():
         await asyncio.sleep(0.1)
     return await method(*args, **kwargs)
 
-rate_limiter = RateLimiter(max_calls=30, time_frame=1)  # 30 calls per second
\ No newline at end of file
+rate_limiter = RateLimiter(max_calls=30, time_frame=1)  # 30 calls per second
+shared_rate_limiter = None
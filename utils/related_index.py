@@ -0,0 +1,219 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+from config import Config
+from models.ticker_data import TickerData
+
+"""
+Related-company index module.
+Maintains an inverted index from normalized officer names, phone numbers, emails,
+email domains and executive addresses to the tickers whose profiles mention them,
+built incrementally from every profile the bot fetches. /related uses it to surface
+shells run by the same people or from the same address in a few dictionary lookups.
+The index is saved as a gzipped key table plus per-ticker key ids and loaded at startup.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+KIND_LABELS = {"o": "Officer", "p": "Phone", "e": "Email", "d": "Email domain", "a": "Address"}
+
+# Keys shared by more tickers than this are registered agents or transfer agents, not signal
+MAX_POSTING = 50
+
+FREE_EMAIL_DOMAINS = frozenset({
+    "gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "aol.com", "icloud.com",
+    "live.com", "msn.com", "protonmail.com", "mail.com", "qq.com", "163.com",
+})
+NAME_NOISE = frozenset({"mr", "mrs", "ms", "dr", "jr", "sr", "ii", "iii", "iv", "esq", "cpa", "phd"})
+ADDRESS_ABBREVIATIONS = {
+    "street": "st", "avenue": "ave", "road": "rd", "boulevard": "blvd", "drive": "dr",
+    "suite": "ste", "floor": "fl", "building": "bldg", "highway": "hwy", "lane": "ln",
+    "place": "pl", "court": "ct", "parkway": "pkwy", "north": "n", "south": "s",
+    "east": "e", "west": "w", "unit": "ste", "#": "ste",
+}
+_NON_WORD = re.compile(r"[^a-z0-9#@.\s]")
+_DIGITS = re.compile(r"\D")
+
+
+def _present(value):
+    return isinstance(value, str) and value.strip() and value.strip().upper() != "N/A"
+
+
+def normalize_name(name):
+    tokens = [t for t in _NON_WORD.sub(" ", name.lower()).replace(".", " ").split() if t not in NAME_NOISE]
+    return " ".join(tokens) if len(tokens) >= 2 else None
+
+
+def normalize_phone(phone):
+    digits = _DIGITS.sub("", phone)
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits if len(digits) >= 7 else None
+
+
+def normalize_address(addr1, city, zip_code):
+    if not _present(addr1):
+        return None
+    words = _NON_WORD.sub(" ", addr1.lower()).replace(".", " ").replace("#", " # ").split()
+    street = " ".join(ADDRESS_ABBREVIATIONS.get(word, word) for word in words)
+    parts = [street]
+    if _present(city):
+        parts.append(city.strip().lower())
+    if _present(zip_code):
+        parts.append(zip_code.strip()[:5])
+    return "|".join(parts)
+
+
+def profile_keys(profile):
+    """Normalized index keys ("<kind>:<value>") found in an OTC company profile"""
+    keys = set()
+    for officer in profile.get("officers") or []:
+        if _present(officer.get("name")):
+            name = normalize_name(officer["name"])
+            if name:
+                keys.add(f"o:{name}")
+    if _present(profile.get("phone")):
+        phone = normalize_phone(profile["phone"])
+        if phone:
+            keys.add(f"p:{phone}")
+    if _present(profile.get("email")):
+        email = profile["email"].strip().lower()
+        keys.add(f"e:{email}")
+        domain = email.rpartition("@")[2]
+        if domain and domain not in FREE_EMAIL_DOMAINS:
+            keys.add(f"d:{domain}")
+    exec_addr = profile.get("execAddr") or {}
+    for addr1, city, zip_code in (
+        (exec_addr.get("addr1"), exec_addr.get("city"), exec_addr.get("zip")),
+        (profile.get("address1"), profile.get("city"), profile.get("zip")),
+    ):
+        address = normalize_address(addr1, city, zip_code)
+        if address:
+            keys.add(f"a:{address}")
+    return keys
+
+
+def describe_key(key):
+    kind, _, value = key.partition(":")
+    if kind == "o":
+        value = value.title()
+    elif kind == "a":
+        value = ", ".join(value.split("|"))
+    return KIND_LABELS.get(kind, kind), value
+
+
+class RelatedIndex:
+    def __init__(self, path=None, save_interval=300):
+        self.path = path or Config.RELATED_INDEX_PATH
+        self.save_interval = save_interval
+        self._postings = {}
+        self._keys_by_ticker = {}
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._keys_by_ticker)
+
+    def add(self, ticker, profile):
+        """(Re)index one ticker's profile, replacing whatever it contributed before"""
+        ticker = ticker.upper()
+        keys = profile_keys(profile or {})
+        previous = self._keys_by_ticker.get(ticker, set())
+        if keys == previous:
+            return
+        for key in previous - keys:
+            posting = self._postings.get(key)
+            if posting is not None:
+                posting.discard(ticker)
+                if not posting:
+                    del self._postings[key]
+        for key in keys - previous:
+            self._postings.setdefault(key, set()).add(ticker)
+        if keys:
+            self._keys_by_ticker[ticker] = keys
+        else:
+            self._keys_by_ticker.pop(ticker, None)
+        self._dirty = True
+
+    def listener(self, ticker, instance):
+        """TickerData.add_listener callback"""
+        self.add(ticker, instance.profile_data)
+
+    def related(self, ticker, limit=20):
+        """
+        Other tickers sharing at least one key with ticker, most shared keys first.
+        Returns [(other_ticker, [shared keys])].
+        """
+        shared = {}
+        for key in self._keys_by_ticker.get(ticker.upper(), ()):
+            posting = self._postings.get(key, ())
+            if len(posting) > MAX_POSTING:
+                continue
+            for other in posting:
+                if other != ticker.upper():
+                    shared.setdefault(other, []).append(key)
+        ranked = sorted(shared.items(), key=lambda item: (-len(item[1]), item[0]))
+        return [(other, sorted(keys)) for other, keys in ranked[:limit]]
+
+    def keys_for(self, ticker):
+        return sorted(self._keys_by_ticker.get(ticker.upper(), ()))
+
+    def load_file(self):
+        if not os.path.exists(self.path):
+            return False
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        key_table = data["keys"]
+        postings, keys_by_ticker = {}, {}
+        for ticker, key_ids in data["tickers"].items():
+            keys = {key_table[key_id] for key_id in key_ids}
+            keys_by_ticker[ticker] = keys
+            for key in keys:
+                postings.setdefault(key, set()).add(ticker)
+        self._postings, self._keys_by_ticker = postings, keys_by_ticker
+        self._dirty = False
+        logger.info("Loaded related index for %s tickers (%s keys) from %s", len(keys_by_ticker), len(postings), self.path)
+        return True
+
+    def _snapshot(self):
+        key_table = sorted(self._postings)
+        key_ids = {key: key_id for key_id, key in enumerate(key_table)}
+        tickers = {ticker: sorted(key_ids[key] for key in keys) for ticker, keys in self._keys_by_ticker.items()}
+        return {"keys": key_table, "tickers": tickers}
+
+    def _write(self, snapshot):
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    async def save(self):
+        if not self._dirty:
+            return False
+        # Snapshot on the loop so the worker thread never sees the index mid-update
+        snapshot = self._snapshot()
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._write, snapshot)
+        except OSError as e:
+            self._dirty = True
+            logger.warning("Could not save related index: %s", e)
+            return False
+        return True
+
+    def index_cached(self):
+        """Index every profile already held in the in-memory ticker cache"""
+        for ticker, instance in TickerData.items():
+            self.add(ticker, instance.profile_data)
+
+    async def run(self):
+        """Background loop persisting the index when it changed"""
+        while True:
+            await asyncio.sleep(self.save_interval)
+            await self.save()
+
+
+related_index = RelatedIndex()
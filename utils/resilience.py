@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+"""
+Upstream resilience module.
+Provides per-endpoint circuit breakers, retries with exponential backoff and jitter,
+and hedged duplicate requests for idempotent calls. Used by the OTC Markets, Claude
+and Scrapfly clients so a degraded upstream fails fast instead of stalling every user.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited because the endpoint's breaker is open"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"Circuit for {name} is open, retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go through right now"""
+        if self.state == self.OPEN:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.reset_timeout:
+                raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                raise CircuitOpenError(self.name, 0)
+            self._trial_in_flight = True
+
+    def release(self):
+        """
+        Forget an in-flight half-open trial that ended without a verdict (cancelled, or a
+        non-transient error such as a 404 that says nothing about the endpoint's health)
+        """
+        self._trial_in_flight = False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("Circuit for %s closed", self.name)
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("Circuit for %s opened after %s failures", self.name, self.failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+
+class LatencyTracker:
+    def __init__(self, window=200, default_delay=1.0, min_delay=0.05, max_delay=5.0):
+        self.samples = deque(maxlen=window)
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
+
+    def hedge_delay(self):
+        """Delay before sending a hedged duplicate: the observed p95, clamped"""
+        if len(self.samples) < 20:
+            return self.default_delay
+        return min(self.max_delay, max(self.min_delay, self.percentile(95)))
+
+
+_breakers = {}
+_latencies = {}
+
+def get_breaker(name):
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+def get_latency_tracker(name):
+    if name not in _latencies:
+        _latencies[name] = LatencyTracker()
+    return _latencies[name]
+
+
+async def _hedged(name, factory):
+    """Run factory(); if it has not finished after the p95 delay, race a duplicate"""
+    tracker = get_latency_tracker(name)
+    pending = {asyncio.ensure_future(factory())}
+    error = None
+    try:
+        done, pending = await asyncio.wait(pending, timeout=tracker.hedge_delay())
+        if not done:
+            logger.debug("Hedging slow request to %s", name)
+            pending.add(asyncio.ensure_future(factory()))
+        while True:
+            for task in done:
+                if task.cancelled():
+                    continue
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+            if not pending:
+                # Every request was cancelled from outside, none of them failed
+                raise error or asyncio.CancelledError()
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Also reached when the caller is cancelled, so no request is left running
+        for task in pending:
+            task.cancel()
+
+
+async def call_with_resilience(name, factory, attempts=3, hedge=False, is_transient=None):
+    """
+    Call factory() (a zero-argument coroutine function) behind the circuit breaker for
+    `name`, retrying transient failures with exponential backoff and jitter. When hedge is
+    True the call is assumed idempotent and a duplicate is raced after the p95 latency.
+    """
+    breaker = get_breaker(name)
+    tracker = get_latency_tracker(name)
+    is_transient = is_transient or (lambda e: True)
+
+    def should_retry(exc):
+        return not isinstance(exc, CircuitOpenError) and is_transient(exc)
+
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(attempts),
+        wait=wait_random_exponential(multiplier=0.5, max=8),
+        retry=retry_if_exception(should_retry),
+        reraise=True,
+    ):
+        with attempt:
+            breaker.allow()
+            started = time.monotonic()
+            try:
+                result = await (_hedged(name, factory) if hedge else factory())
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                if is_transient(e):
+                    breaker.record_failure()
+                else:
+                    # Neutral: must not reset the failure streak of a degrading endpoint
+                    breaker.release()
+                raise
+            tracker.record(time.monotonic() - started)
+            breaker.record_success()
+            return result
@@ -0,0 +1,244 @@
+import logging
+import re
+import time
+from datetime import datetime, timezone
+import numpy as np
+from repos.ticker_repo import snapshot_fields
+
+"""
+Ticker screener module.
+Keeps the latest snapshot of every known ticker in a columnar in-memory table: NumPy
+float arrays for share counts, close and filing time, dictionary-encoded tier and
+filing type, and a small int column for the caveat emptor flag. Rows are updated in
+place as profiles are fetched. Screen expressions are parsed once and evaluated as
+vectorized boolean masks over whole columns, so a screen over the full OTC universe
+takes milliseconds.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_COLUMNS = ("outstanding_shares", "dtc_shares", "float_shares", "close", "filing_ts")
+CODED_COLUMNS = ("tier", "filing_type")
+
+# Expression field -> column, or a derived value computed from columns at query time
+FIELD_ALIASES = {
+    "os": "outstanding_shares",
+    "dtc": "dtc_shares",
+    "float": "float_shares",
+    "price": "close",
+    "close": "close",
+    "mcap": "market_cap",
+    "filed": "filing_age_days",
+    "tier": "tier",
+    "type": "filing_type",
+}
+TIER_ALIASES = {
+    "current": "pink current",
+    "limited": "pink limited",
+    "nolimited": "no information",
+    "expert": "expert market",
+    "qx": "otcqx",
+    "qb": "otcqb",
+}
+SUFFIXES = {"k": 1e3, "m": 1e6, "b": 1e9}
+SECONDS_PER_DAY = 86400
+
+_CONDITION = re.compile(r"^(?P<field>[a-z_]+)\s*(?P<op><=|>=|!=|=|<|>)\s*(?P<value>.+)$")
+_NUMBER = re.compile(r"^(?P<number>\d+(?:\.\d+)?)(?P<suffix>[kmbd]?)$")
+
+
+class ScreenError(ValueError):
+    """Raised for screen expressions that cannot be parsed"""
+
+
+def _epoch(value):
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    return float("nan")
+
+
+def _parse_number(text):
+    match = _NUMBER.match(text.lower())
+    if not match:
+        raise ScreenError(f"'{text}' is not a number (use e.g. 50M, 0.005 or 30d)")
+    return float(match["number"]) * SUFFIXES.get(match["suffix"], 1.0)
+
+
+def parse_expression(expression):
+    """
+    Parse "tier=current caveat=no float<50M os<500M filed<30d sort=-mcap limit=20" into
+    (conditions, caveat, sort_field, descending, limit). Terms may be separated by
+    spaces or commas; "!caveat" and "caveat" are shorthands for caveat=no / caveat=yes.
+    """
+    conditions, caveat, sort_field, descending, limit = [], None, "float_shares", False, 15
+    for term in filter(None, re.split(r"[,\s]+", expression.strip().lower())):
+        if term in ("caveat", "!caveat", "-caveat"):
+            caveat = term == "caveat"
+            continue
+        match = _CONDITION.match(term)
+        if not match:
+            raise ScreenError(f"Cannot understand '{term}'")
+        field, op, value = match["field"], match["op"], match["value"]
+
+        if field == "caveat":
+            if value not in ("yes", "no", "true", "false") or op not in ("=", "!="):
+                raise ScreenError("Use caveat=yes or caveat=no")
+            caveat = (value in ("yes", "true")) == (op == "=")
+        elif field == "sort":
+            descending = value.startswith("-")
+            sort_field = FIELD_ALIASES.get(value.lstrip("-"))
+            if sort_field is None or sort_field in CODED_COLUMNS:
+                raise ScreenError(f"Cannot sort by '{value.lstrip('-')}'")
+        elif field == "limit":
+            limit = max(1, min(int(_parse_number(value)), 50))
+        elif field not in FIELD_ALIASES:
+            raise ScreenError(f"Unknown field '{field}' (use {', '.join(sorted(FIELD_ALIASES))})")
+        elif FIELD_ALIASES[field] in CODED_COLUMNS:
+            if op not in ("=", "!="):
+                raise ScreenError(f"{field} only supports = and !=")
+            conditions.append((FIELD_ALIASES[field], op, TIER_ALIASES.get(value, value) if field == "tier" else value))
+        else:
+            conditions.append((FIELD_ALIASES[field], op, _parse_number(value)))
+    return conditions, caveat, sort_field, descending, limit
+
+
+class Screener:
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.size = 0
+        self.tickers = []
+        self._rows = {}
+        self._columns = None
+        self._dictionaries = {column: [] for column in CODED_COLUMNS}
+        self._codes = {column: {} for column in CODED_COLUMNS}
+
+    def __len__(self):
+        return self.size
+
+    def _allocate(self, capacity):
+        columns = {column: np.full(capacity, np.nan) for column in NUMERIC_COLUMNS}
+        columns.update({column: np.full(capacity, -1, dtype=np.int32) for column in CODED_COLUMNS})
+        columns["caveat"] = np.full(capacity, -1, dtype=np.int8)
+        if self._columns is not None:
+            for name, values in self._columns.items():
+                columns[name][:self.size] = values[:self.size]
+        self._columns = columns
+        self.capacity = capacity
+
+    def _code(self, column, value):
+        if value is None:
+            return -1
+        codes = self._codes[column]
+        if value not in codes:
+            codes[value] = len(self._dictionaries[column])
+            self._dictionaries[column].append(value)
+        return codes[value]
+
+    def upsert(self, ticker, fields, caveat=None):
+        """Write one ticker's latest values (snapshot_fields shape) into its row"""
+        if self._columns is None:
+            self._allocate(self.capacity)
+        ticker = ticker.upper()
+        row = self._rows.get(ticker)
+        if row is None:
+            if self.size == self.capacity:
+                self._allocate(self.capacity * 2)
+            row = self._rows[ticker] = self.size
+            self.tickers.append(ticker)
+            self.size += 1
+
+        columns = self._columns
+        for column in NUMERIC_COLUMNS[:-1]:
+            value = fields.get(column)
+            columns[column][row] = float("nan") if value is None else value
+        columns["filing_ts"][row] = _epoch(fields.get("filing_date"))
+        for column in CODED_COLUMNS:
+            columns[column][row] = self._code(column, fields.get(column))
+        if caveat is not None:
+            columns["caveat"][row] = 1 if caveat else 0
+
+    def listener(self, ticker, instance):
+        """TickerData.add_listener callback"""
+        self.upsert(ticker, snapshot_fields(instance), (instance.profile_data or {}).get("isCaveatEmptor"))
+
+    def load(self, latest_rows, cached_instances=()):
+        """
+        Bootstrap from ticker_repo.all_latest() rows, then from cached TickerData
+        instances, which are fresher and also carry the caveat emptor flag.
+        """
+        for ticker, fields in latest_rows.items():
+            self.upsert(ticker, fields)
+        for ticker, instance in cached_instances:
+            self.listener(ticker, instance)
+        logger.info("Screener loaded %s tickers", self.size)
+
+    def _values(self, name, now):
+        columns, n = self._columns, self.size
+        if name == "market_cap":
+            return columns["outstanding_shares"][:n] * columns["close"][:n]
+        if name == "filing_age_days":
+            return (now - columns["filing_ts"][:n]) / SECONDS_PER_DAY
+        return columns[name][:n]
+
+    def _coded_mask(self, column, op, value):
+        # Evaluate the string predicate once per distinct value, then match codes
+        matching = [code for code, name in enumerate(self._dictionaries[column]) if value in name.lower()]
+        mask = np.isin(self._columns[column][:self.size], matching)
+        return ~mask & (self._columns[column][:self.size] >= 0) if op == "!=" else mask
+
+    def screen(self, expression):
+        """Returns (rows, total matches, elapsed ms) for a screen expression"""
+        conditions, caveat, sort_field, descending, limit = parse_expression(expression)
+        started = time.perf_counter()
+        if not self.size:
+            return [], 0, 0.0
+
+        now = time.time()
+        mask = np.ones(self.size, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for column, op, value in conditions:
+                if column in CODED_COLUMNS:
+                    mask &= self._coded_mask(column, op, value)
+                    continue
+                values = self._values(column, now)
+                # NaN (unknown) never satisfies a numeric condition
+                if op == "<":
+                    mask &= values < value
+                elif op == "<=":
+                    mask &= values <= value
+                elif op == ">":
+                    mask &= values > value
+                elif op == ">=":
+                    mask &= values >= value
+                elif op == "=":
+                    mask &= values == value
+                else:
+                    mask &= (values != value) & ~np.isnan(values)
+        if caveat is not None:
+            mask &= self._columns["caveat"][:self.size] == (1 if caveat else 0)
+
+        selected = np.flatnonzero(mask)
+        keys = self._values(sort_field, now)[selected]
+        keys = np.where(np.isnan(keys), np.inf, -keys if descending else keys)
+        order = selected[np.argsort(keys, kind="stable")][:limit]
+
+        rows = []
+        for index in order:
+            rows.append({
+                "ticker": self.tickers[index],
+                "tier": self._decode("tier", index),
+                "filing_type": self._decode("filing_type", index),
+                "outstanding_shares": self._columns["outstanding_shares"][index],
+                "float_shares": self._columns["float_shares"][index],
+                "close": self._columns["close"][index],
+                "filing_age_days": (now - self._columns["filing_ts"][index]) / SECONDS_PER_DAY,
+            })
+        return rows, int(selected.size), (time.perf_counter() - started) * 1000
+
+    def _decode(self, column, index):
+        code = self._columns[column][index]
+        return self._dictionaries[column][code] if code >= 0 else None
+
+
+screener = Screener()
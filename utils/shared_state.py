@@ -0,0 +1,444 @@
+import abc
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from datetime import datetime
+from telegram.ext import BasePersistence, PersistenceInput
+from config import Config
+from models.ticker_data import TickerData
+
+"""
+Shared state module.
+Provides a small key-value abstraction so several bot workers can share the ticker
+cache, rate-limit buckets, in-flight request coalescing and conversation state.
+InProcessBackend keeps everything in this process (the single-worker default);
+RedisBackend talks to a networked Redis and accepts any redis.asyncio-compatible
+client, so tests can pass a local stand-in such as fakeredis. Background loops that
+must run once per deployment (alerts, news ingestion, batch polling) go through
+run_as_leader, which holds a renewable lease in the backend.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class StateBackend(abc.ABC):
+    """Interface implemented by every shared-state backend. Values must be JSON-serializable."""
+
+    is_shared = False
+
+    @abc.abstractmethod
+    async def get(self, key):
+        ...
+
+    @abc.abstractmethod
+    async def set(self, key, value, ttl=None):
+        ...
+
+    @abc.abstractmethod
+    async def set_if_absent(self, key, value, ttl=None):
+        ...
+
+    @abc.abstractmethod
+    async def acquire_lease(self, key, owner, ttl):
+        """Take key for owner, or extend it if owner already holds it. Returns whether owner holds it."""
+
+    @abc.abstractmethod
+    async def delete(self, key):
+        ...
+
+    @abc.abstractmethod
+    async def incr(self, key, ttl=None):
+        ...
+
+    @abc.abstractmethod
+    async def hset(self, name, field, value):
+        ...
+
+    @abc.abstractmethod
+    async def hget(self, name, field):
+        ...
+
+    @abc.abstractmethod
+    async def hgetall(self, name):
+        ...
+
+    @abc.abstractmethod
+    async def hdel(self, name, field):
+        ...
+
+    async def close(self):
+        pass
+
+
+class InProcessBackend(StateBackend):
+    def __init__(self):
+        self._values = {}
+        self._expiry = {}
+        self._hashes = {}
+
+    def _alive(self, key):
+        expires_at = self._expiry.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._values.pop(key, None)
+            self._expiry.pop(key, None)
+        return key in self._values
+
+    def _store(self, key, value, ttl):
+        self._values[key] = value
+        if ttl:
+            self._expiry[key] = time.monotonic() + ttl
+        else:
+            self._expiry.pop(key, None)
+
+    async def get(self, key):
+        return self._values[key] if self._alive(key) else None
+
+    async def set(self, key, value, ttl=None):
+        self._store(key, value, ttl)
+
+    async def set_if_absent(self, key, value, ttl=None):
+        if self._alive(key):
+            return False
+        self._store(key, value, ttl)
+        return True
+
+    async def acquire_lease(self, key, owner, ttl):
+        if self._alive(key) and self._values[key] != owner:
+            return False
+        self._store(key, owner, ttl)
+        return True
+
+    async def delete(self, key):
+        self._values.pop(key, None)
+        self._expiry.pop(key, None)
+
+    async def incr(self, key, ttl=None):
+        if not self._alive(key):
+            self._store(key, 0, ttl)
+        self._values[key] += 1
+        return self._values[key]
+
+    async def hset(self, name, field, value):
+        self._hashes.setdefault(name, {})[field] = value
+
+    async def hget(self, name, field):
+        return self._hashes.get(name, {}).get(field)
+
+    async def hgetall(self, name):
+        return dict(self._hashes.get(name, {}))
+
+    async def hdel(self, name, field):
+        self._hashes.get(name, {}).pop(field, None)
+
+
+# Extend the lease if owner holds it, otherwise take it only if nobody does
+_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+if redis.call('set', KEYS[1], ARGV[1], 'PX', ARGV[2], 'NX') then
+    return 1
+end
+return 0
+"""
+
+
+class RedisBackend(StateBackend):
+    is_shared = True
+
+    def __init__(self, url=None, client=None, prefix="otcbot:"):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    async def get(self, key):
+        raw = await self.client.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key, value, ttl=None):
+        await self.client.set(self._key(key), json.dumps(value), ex=ttl)
+
+    async def set_if_absent(self, key, value, ttl=None):
+        return bool(await self.client.set(self._key(key), json.dumps(value), ex=ttl, nx=True))
+
+    async def acquire_lease(self, key, owner, ttl):
+        return bool(await self.client.eval(_LEASE_SCRIPT, 1, self._key(key), json.dumps(owner), int(ttl * 1000)))
+
+    async def delete(self, key):
+        await self.client.delete(self._key(key))
+
+    async def incr(self, key, ttl=None):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(self._key(key))
+            if ttl:
+                pipe.expire(self._key(key), ttl)
+            results = await pipe.execute()
+        return results[0]
+
+    async def hset(self, name, field, value):
+        await self.client.hset(self._key(name), field, json.dumps(value))
+
+    async def hget(self, name, field):
+        raw = await self.client.hget(self._key(name), field)
+        return json.loads(raw) if raw is not None else None
+
+    async def hgetall(self, name):
+        raw = await self.client.hgetall(self._key(name))
+        return {field: json.loads(value) for field, value in raw.items()}
+
+    async def hdel(self, name, field):
+        await self.client.hdel(self._key(name), field)
+
+    async def close(self):
+        await self.client.close()
+
+
+def create_backend(url=None):
+    if url and url.startswith(("redis://", "rediss://")):
+        return RedisBackend(url)
+    return InProcessBackend()
+
+_backend = None
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = create_backend(Config.SHARED_STATE_URL)
+    return _backend
+
+def set_backend(backend):
+    """Replace the process-wide backend (e.g. with a stand-in in tests)"""
+    global _backend
+    _backend = backend
+
+
+# Leader election for per-deployment background loops
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+LEADER_LEASE_SECONDS = 60
+
+async def run_as_leader(name, factory, ttl=LEADER_LEASE_SECONDS):
+    """
+    Run factory() (a zero-argument coroutine function, usually a forever loop) only while
+    this worker holds the `name` lease. The lease is renewed every ttl / 3 seconds; a
+    worker that fails to renew it cancels its loop, and when the holder dies another
+    worker takes over once the lease expires. Without a shared backend factory() simply
+    runs here.
+    """
+    backend = get_backend()
+    if not backend.is_shared:
+        return await factory()
+
+    key = f"leader:{name}"
+    while True:
+        try:
+            leading = await backend.acquire_lease(key, WORKER_ID, ttl)
+        except Exception as e:
+            logger.warning("Could not acquire %s lease: %s", name, e)
+            leading = False
+        if leading:
+            logger.info("Worker %s is running %s", WORKER_ID, name)
+            task = asyncio.create_task(factory())
+            try:
+                while True:
+                    done, _ = await asyncio.wait({task}, timeout=ttl / 3)
+                    if done:
+                        return task.result()
+                    try:
+                        leading = await backend.acquire_lease(key, WORKER_ID, ttl)
+                    except Exception as e:
+                        logger.warning("Could not renew %s lease: %s", name, e)
+                        leading = False
+                    if not leading:
+                        logger.warning("Worker %s lost the %s lease, stopping it here", WORKER_ID, name)
+                        break
+            finally:
+                if not task.done():
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(ttl / 3)
+
+
+# Ticker cache
+
+TICKER_TTL_SECONDS = 6 * 60 * 60
+
+def _encode_ticker_data(instance):
+    data = instance.to_dict()
+    data["timestamp"] = data["timestamp"].isoformat()
+    return data
+
+def _decode_ticker_data(data):
+    data = dict(data)
+    data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+    return TickerData.from_dict(data)
+
+class SharedTickerCache:
+    """Mirrors TickerData.set() into the shared backend and serves misses from it"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or get_backend()
+        self._writes = set()
+
+    def attach(self):
+        if not self.backend.is_shared:
+            return
+        TickerData.add_listener(self._publish)
+        TickerData.add_remote_loader(self.load)
+
+    def _publish(self, ticker, instance):
+        task = asyncio.create_task(self.backend.set(f"ticker:{ticker}", _encode_ticker_data(instance), ttl=TICKER_TTL_SECONDS))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def load(self, ticker):
+        try:
+            data = await self.backend.get(f"ticker:{ticker.upper()}")
+        except Exception as e:
+            logger.error("Shared ticker cache read failed for %s: %s", ticker, e)
+            return None
+        return _decode_ticker_data(data) if data else None
+
+
+# In-flight request coalescing
+
+_in_flight = {}
+
+async def coalesce(key, factory, lookup=None, lock_ttl=30, wait_timeout=10):
+    """
+    Run factory() at most once per key at a time. Concurrent callers in this process
+    share the same future; callers in other workers wait for the lock holder and then
+    read its result through lookup() instead of repeating the upstream call.
+    """
+    if key in _in_flight:
+        return await asyncio.shield(_in_flight[key])
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        result = await _coalesce_across_workers(key, factory, lookup, lock_ttl, wait_timeout)
+        future.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Avoid "exception was never retrieved" when nobody else was waiting
+        future.exception()
+        raise
+    finally:
+        _in_flight.pop(key, None)
+
+async def _coalesce_across_workers(key, factory, lookup, lock_ttl, wait_timeout):
+    backend = get_backend()
+    if not backend.is_shared or lookup is None:
+        return await factory()
+
+    lock_key = f"inflight:{key}"
+    if await backend.set_if_absent(lock_key, True, ttl=lock_ttl):
+        try:
+            return await factory()
+        finally:
+            await backend.delete(lock_key)
+
+    deadline = time.monotonic() + wait_timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.2)
+        if await backend.get(lock_key) is None:
+            result = await lookup()
+            if result is not None:
+                return result
+            break
+    return await factory()
+
+
+# Conversation and user_data persistence
+
+class SharedStatePersistence(BasePersistence):
+    """
+    python-telegram-bot persistence backed by the shared-state backend. user_data is
+    re-read before every update so handlers on any worker see the latest values, and
+    conversation states survive restarts. PTB hands changes to update_* from its
+    persistence job every update_interval seconds, so another worker can see a user's
+    data up to that long after it was changed; the interval is kept short for that
+    reason.
+    """
+
+    def __init__(self, backend=None, update_interval=1):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.backend = backend or get_backend()
+
+    async def get_user_data(self):
+        stored = await self.backend.hgetall("ptb:user_data")
+        return {int(user_id): data for user_id, data in stored.items()}
+
+    async def update_user_data(self, user_id, data):
+        await self.backend.hset("ptb:user_data", str(user_id), data)
+
+    async def refresh_user_data(self, user_id, user_data):
+        stored = await self.backend.hget("ptb:user_data", str(user_id))
+        if stored is None:
+            return
+        for key in list(user_data):
+            if key not in stored:
+                del user_data[key]
+        user_data.update(stored)
+
+    async def drop_user_data(self, user_id):
+        await self.backend.hdel("ptb:user_data", str(user_id))
+
+    async def get_conversations(self, name):
+        stored = await self.backend.hgetall(f"ptb:conversations:{name}")
+        return {tuple(json.loads(key)): state for key, state in stored.items()}
+
+    async def update_conversation(self, name, key, new_state):
+        field = json.dumps(list(key))
+        if new_state is None:
+            await self.backend.hdel(f"ptb:conversations:{name}", field)
+        else:
+            await self.backend.hset(f"ptb:conversations:{name}", field, new_state)
+
+    async def get_chat_data(self):
+        return {}
+
+    async def update_chat_data(self, chat_id, data):
+        pass
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        pass
+
+    async def drop_chat_data(self, chat_id):
+        pass
+
+    async def get_bot_data(self):
+        return {}
+
+    async def update_bot_data(self, data):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    async def get_callback_data(self):
+        return None
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def flush(self):
+        # PTB calls update_* for everything still unsaved before flush() on shutdown, and
+        # each of those writes straight to the backend, so nothing is buffered here
+        pass
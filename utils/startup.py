@@ -0,0 +1,38 @@
+import logging
+import time
+from contextlib import contextmanager
+
+"""
+Startup timing module.
+Records how long each phase of bot startup takes, from process start to the moment
+polling begins, and logs a short report so slow dependencies are easy to spot.
+
+"""
+
+logger = logging.getLogger(__name__)
+# The report should be visible even when the root level is ERROR
+logger.setLevel(logging.INFO)
+
+
+class StartupTimer:
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.steps = []
+
+    @contextmanager
+    def step(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - began))
+
+    def mark(self, name):
+        """Record a step measured from process start"""
+        self.steps.append((name, time.perf_counter() - self.started))
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        lines = [f"  {name:<28} {seconds * 1000:8.1f} ms" for name, seconds in self.steps]
+        logger.info("Startup timing:\n" + "\n".join(lines) + f"\n  {'total':<28} {total * 1000:8.1f} ms")
+        return total
@@ -0,0 +1,117 @@
+import asyncio
+import bisect
+import difflib
+import logging
+import os
+import time
+from config import Config
+from api.otc_markets import get_symbol_list
+
+"""
+Ticker symbol directory module.
+Keeps the full list of OTC symbols in memory as a sorted tuple plus a frozenset, so
+plain chat messages can be checked for membership before any network I/O. Also
+provides prefix and fuzzy suggestions for mistyped tickers. The list is refreshed
+periodically from OTC Markets and saved to a local file for fast restarts.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolDirectory:
+    def __init__(self, path=None, refresh_hours=None):
+        self.path = path or Config.SYMBOL_DIRECTORY_PATH
+        self.refresh_seconds = (refresh_hours or Config.SYMBOL_REFRESH_HOURS) * 3600
+        self._sorted = ()
+        self._members = frozenset()
+        self._by_length = {}
+        self.updated_at = 0.0
+
+    @property
+    def is_loaded(self):
+        return bool(self._members)
+
+    def __len__(self):
+        return len(self._sorted)
+
+    def symbols(self):
+        """All symbols in alphabetical order"""
+        return self._sorted
+
+    def __contains__(self, symbol):
+        return symbol.upper() in self._members
+
+    def replace(self, symbols, updated_at=None):
+        ordered = tuple(sorted(set(s.upper() for s in symbols if s)))
+        by_length = {}
+        for symbol in ordered:
+            by_length.setdefault(len(symbol), []).append(symbol)
+        self._sorted = ordered
+        self._members = frozenset(ordered)
+        self._by_length = by_length
+        self.updated_at = updated_at or time.time()
+
+    def suggest_prefix(self, prefix, limit=10):
+        """Symbols starting with prefix, in alphabetical order"""
+        prefix = prefix.upper()
+        start = bisect.bisect_left(self._sorted, prefix)
+        results = []
+        for symbol in self._sorted[start:]:
+            if not symbol.startswith(prefix) or len(results) >= limit:
+                break
+            results.append(symbol)
+        return results
+
+    def suggest_fuzzy(self, text, limit=3, cutoff=0.7):
+        """Closest symbols to a mistyped ticker, comparing only symbols of similar length"""
+        text = text.upper()
+        candidates = []
+        for length in (len(text) - 1, len(text), len(text) + 1):
+            candidates.extend(self._by_length.get(length, ()))
+        return difflib.get_close_matches(text, candidates, n=limit, cutoff=cutoff)
+
+    def load_file(self):
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            symbols = [line.strip() for line in f]
+        self.replace(symbols, updated_at=os.path.getmtime(self.path))
+        logger.info("Loaded %s symbols from %s", len(self), self.path)
+        return True
+
+    def save_file(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self._sorted))
+        os.replace(tmp_path, self.path)
+
+    async def refresh(self):
+        symbols = await get_symbol_list()
+        if not symbols:
+            logger.warning("Symbol list download returned no symbols, keeping the current directory")
+            return False
+        self.replace(symbols)
+        logger.info("Refreshed symbol directory with %s symbols", len(self))
+        try:
+            await asyncio.to_thread(self.save_file)
+        except OSError as e:
+            logger.warning("Could not save symbol directory: %s", e)
+        return True
+
+    async def run(self):
+        """Background loop keeping the directory fresh"""
+        while True:
+            age = time.time() - self.updated_at
+            if age >= self.refresh_seconds:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    logger.error("Failed to refresh symbol directory: %s", e)
+                    await asyncio.sleep(300)
+                    continue
+                age = 0
+            await asyncio.sleep(self.refresh_seconds - age)
+
+
+symbol_directory = SymbolDirectory()
@@ -0,0 +1,269 @@
+import asyncio
+import json
+import logging
+import sqlite3
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from config import Config
+from models.ticker_data import TickerData
+
+"""
+Persistent ticker cache module.
+Provides a second cache tier behind the in-memory TickerData cache that survives worker restarts.
+Snapshots are queued on every TickerData.set(), written in batches by a background task,
+bulk-loaded back into memory at startup and read through on in-memory misses. Uses Postgres when DATABASE_URL is configured
+and falls back to a local SQLite file otherwise.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class _PostgresBackend:
+    def __init__(self, db):
+        self.db = db
+
+    async def setup(self):
+        await self.db.ensure_connection()
+        async with self.db.acquire() as conn:
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS ticker_cache (
+                    ticker TEXT PRIMARY KEY,
+                    profile_data JSONB,
+                    trade_data JSONB,
+                    news_data JSONB,
+                    fetched_at TIMESTAMP NOT NULL
+                )
+            ''')
+
+    async def write_many(self, rows):
+        async with self.db.acquire() as conn:
+            await conn.executemany('''
+                INSERT INTO ticker_cache (ticker, profile_data, trade_data, news_data, fetched_at)
+                VALUES ($1, $2::jsonb, $3::jsonb, $4::jsonb, $5)
+                ON CONFLICT (ticker) DO UPDATE SET
+                    profile_data = EXCLUDED.profile_data,
+                    trade_data = EXCLUDED.trade_data,
+                    news_data = EXCLUDED.news_data,
+                    fetched_at = EXCLUDED.fetched_at
+                WHERE ticker_cache.fetched_at <= EXCLUDED.fetched_at
+            ''', rows)
+
+    async def read_one(self, ticker):
+        async with self.db.acquire() as conn:
+            row = await conn.fetchrow('''
+                SELECT ticker, profile_data, trade_data, news_data, fetched_at
+                FROM ticker_cache
+                WHERE ticker = $1
+            ''', ticker)
+            return tuple(row) if row else None
+
+    async def read_since(self, since):
+        async with self.db.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT ticker, profile_data, trade_data, news_data, fetched_at
+                FROM ticker_cache
+                WHERE fetched_at >= $1
+            ''', since)
+            return [tuple(row) for row in rows]
+
+
+class _SQLiteBackend:
+    def __init__(self, path):
+        self.path = path
+
+    def _connect(self):
+        return sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES)
+
+    def _setup(self):
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS ticker_cache (
+                    ticker TEXT PRIMARY KEY,
+                    profile_data TEXT,
+                    trade_data TEXT,
+                    news_data TEXT,
+                    fetched_at TIMESTAMP NOT NULL
+                )
+            ''')
+
+    def _write_many(self, rows):
+        with self._connect() as conn:
+            conn.executemany('''
+                INSERT INTO ticker_cache (ticker, profile_data, trade_data, news_data, fetched_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (ticker) DO UPDATE SET
+                    profile_data = excluded.profile_data,
+                    trade_data = excluded.trade_data,
+                    news_data = excluded.news_data,
+                    fetched_at = excluded.fetched_at
+                WHERE ticker_cache.fetched_at <= excluded.fetched_at
+            ''', rows)
+
+    def _read_one(self, ticker):
+        with self._connect() as conn:
+            return conn.execute('''
+                SELECT ticker, profile_data, trade_data, news_data, fetched_at
+                FROM ticker_cache
+                WHERE ticker = ?
+            ''', (ticker,)).fetchone()
+
+    def _read_since(self, since):
+        with self._connect() as conn:
+            return conn.execute('''
+                SELECT ticker, profile_data, trade_data, news_data, fetched_at
+                FROM ticker_cache
+                WHERE fetched_at >= ?
+            ''', (since,)).fetchall()
+
+    async def setup(self):
+        await asyncio.to_thread(self._setup)
+
+    async def write_many(self, rows):
+        await asyncio.to_thread(self._write_many, rows)
+
+    async def read_one(self, ticker):
+        return await asyncio.to_thread(self._read_one, ticker)
+
+    async def read_since(self, since):
+        return await asyncio.to_thread(self._read_since, since)
+
+
+class TickerCacheStore:
+    def __init__(self, db=None, sqlite_path=None, flush_interval=None, max_pending=None):
+        if db is not None and Config.DATABASE_URL:
+            self.backend = _PostgresBackend(db)
+        else:
+            self.backend = _SQLiteBackend(sqlite_path or Config.CACHE_SQLITE_PATH)
+        self.flush_interval = flush_interval or Config.CACHE_FLUSH_INTERVAL
+        self.max_pending = max_pending or Config.CACHE_MAX_PENDING
+        self._pending = OrderedDict()
+        self._flush_task = None
+        self._ready = False
+        self._flush_failed = False
+
+    @property
+    def writable(self):
+        """Whether snapshots are currently reaching the backend"""
+        return self._ready and not self._flush_failed
+
+    def attach(self):
+        """Start receiving every TickerData.set() as a pending write and serve cache misses"""
+        TickerData.add_listener(self.mark_dirty)
+        TickerData.add_remote_loader(self.load)
+
+    def mark_dirty(self, ticker, instance):
+        if not self._ready:
+            # The backend never came up, so nothing would ever drain the queue
+            return
+        ticker = ticker.upper()
+        self._pending[ticker] = instance
+        self._pending.move_to_end(ticker)
+        self._trim()
+
+    def _trim(self):
+        """Drop the oldest pending snapshots beyond max_pending (the tier is only a cache)"""
+        dropped = 0
+        while len(self._pending) > self.max_pending:
+            self._pending.popitem(last=False)
+            dropped += 1
+        if dropped:
+            logger.warning("Persistent cache backlog full, dropped %s oldest snapshots", dropped)
+
+    async def warm_start(self, max_age_hours=None):
+        """Create the cache table if needed and bulk-load recent snapshots into memory"""
+        max_age_hours = max_age_hours or Config.CACHE_WARM_MAX_AGE_HOURS
+        await self.backend.setup()
+        self._ready = True
+
+        since = datetime.now() - timedelta(hours=max_age_hours)
+        rows = await self.backend.read_since(since)
+        instances = {}
+        for row in rows:
+            instance = self._decode(row)
+            if instance is not None:
+                instances[row[0]] = instance
+
+        TickerData.load_many(instances)
+        logger.info("Warm-started ticker cache with %s tickers", len(instances))
+        return len(instances)
+
+    @staticmethod
+    def _decode(row):
+        ticker, profile_data, trade_data, news_data, fetched_at = row
+        try:
+            return TickerData(
+                json.loads(profile_data) if profile_data else {},
+                json.loads(trade_data) if trade_data else {},
+                json.loads(news_data) if news_data else [],
+                timestamp=fetched_at,
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning("Skipping unreadable cache row for %s: %s", ticker, e)
+            return None
+
+    async def load(self, ticker):
+        """Read one ticker from the persistent tier, e.g. a snapshot written by the universe crawl"""
+        if not self._ready:
+            return None
+        pending = self._pending.get(ticker.upper())
+        if pending is not None:
+            return pending
+        try:
+            row = await self.backend.read_one(ticker.upper())
+        except Exception as e:
+            logger.error("Persistent cache read failed for %s: %s", ticker, e)
+            return None
+        return self._decode(row) if row else None
+
+    async def flush(self):
+        """Write all pending snapshots in one batch"""
+        if not self._ready or not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, OrderedDict()
+        rows = [
+            (
+                ticker,
+                json.dumps(instance.profile_data),
+                json.dumps(instance.trade_data),
+                json.dumps(instance.news_data),
+                instance.timestamp,
+            )
+            for ticker, instance in pending.items()
+        ]
+        try:
+            await self.backend.write_many(rows)
+            self._flush_failed = False
+            logger.debug("Flushed %s ticker snapshots to the persistent cache", len(rows))
+            return len(rows)
+        except Exception as e:
+            logger.error("Failed to flush ticker cache: %s", e)
+            self._flush_failed = True
+            # Put the batch back as the oldest entries; snapshots queued in the meantime are newer
+            for ticker, instance in self._pending.items():
+                pending[ticker] = instance
+                pending.move_to_end(ticker)
+            self._pending = pending
+            self._trim()
+            return 0
+
+    async def run(self):
+        """Background loop that periodically flushes pending snapshots"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self.run())
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
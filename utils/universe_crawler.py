@@ -0,0 +1,198 @@
+import aiohttp
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from api.otc_markets import get_profile_data, get_trade_data
+from config import Config
+from models.ticker_data import TickerData
+from repos.ticker_repo import ticker_repo
+from utils.message_sender import TokenBucket
+from utils.resilience import CircuitOpenError
+from utils.shared_state import run_as_leader
+from utils.symbol_directory import symbol_directory
+
+"""
+Universe crawler module.
+Walks the full OTC symbol list once a night and fetches profile and trade data for
+every ticker through the regular OTC client, at bounded concurrency and under its own
+request rate so user traffic keeps most of the OTC budget. Tickers are visited in
+priority order (watched first, then by recent filing or fetch activity) and results are
+pushed through the TickerData listeners and flushed to the database in batches. The
+pass order and position are checkpointed after every batch, so a restart resumes
+where the previous process stopped. A pass only advances while the persistent cache
+accepts writes, so a failing backend cannot pile the universe up in memory, and with
+a shared backend only the worker holding the crawl lease runs it.
+
+"""
+
+logger = logging.getLogger(__name__)
+
+# Pause this long when the OTC circuit breaker is open instead of burning the batch
+CIRCUIT_BACKOFF_SECONDS = 60
+
+
+def _epoch(value):
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    return 0.0
+
+
+def prioritize(symbols, watched, latest):
+    """
+    Crawl order: watched tickers first, then tickers by their most recent filing or
+    snapshot (newest first), then tickers the bot has never seen.
+    """
+    def key(symbol):
+        if symbol in watched:
+            return (0, 0.0, symbol)
+        info = latest.get(symbol)
+        if info:
+            return (1, -max(_epoch(info.get("filing_date")), _epoch(info.get("ts"))), symbol)
+        return (2, 0.0, symbol)
+
+    return sorted(symbols, key=key)
+
+
+class UniverseCrawler:
+    def __init__(self, db, cache, flushers=(), checkpoint_path=None, concurrency=None, requests_per_second=None, batch_size=None):
+        self.db = db
+        self.cache = cache
+        self.flushers = flushers
+        self.checkpoint_path = checkpoint_path or Config.CRAWL_CHECKPOINT_PATH
+        self.batch_size = batch_size or Config.CRAWL_BATCH_SIZE
+        self._semaphore = asyncio.Semaphore(concurrency or Config.CRAWL_CONCURRENCY)
+        rate = requests_per_second or Config.CRAWL_REQUESTS_PER_SECOND
+        self._bucket = TokenBucket(rate, rate)
+        self.stats = {"fetched": 0, "skipped": 0, "failed": 0}
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable crawl checkpoint: %s", e)
+            return None
+
+    def save_checkpoint(self, state):
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    async def _new_pass(self):
+        watched = set()
+        if self.db.pool:
+            try:
+                watched = set(await self.db.get_watched_tickers())
+            except Exception as e:
+                logger.warning("Crawl ordering without watchlists: %s", e)
+        order = prioritize(symbol_directory.symbols(), watched, ticker_repo.all_latest())
+        return {"started_at": time.time(), "order": order, "position": 0, "completed_at": None}
+
+    async def _fetch(self, ticker):
+        # Read through to the shared and persistent tiers: the crawl leaves almost nothing resident
+        cached = await TickerData.aget(ticker, keep=False)
+        if cached and not cached.is_outdated(Config.CRAWL_SKIP_FRESH_HOURS * 60):
+            self.stats["skipped"] += 1
+            return None
+        async with self._semaphore:
+            for attempt in range(3):
+                try:
+                    await self._bucket.acquire()
+                    profile_data = await get_profile_data(ticker)
+                    await self._bucket.acquire()
+                    trade_data = await get_trade_data(ticker)
+                    break
+                except CircuitOpenError:
+                    await asyncio.sleep(CIRCUIT_BACKOFF_SECONDS)
+                except aiohttp.ClientResponseError as e:
+                    if e.status == 404:
+                        # Delisted or revoked since the symbol list was built
+                        self.stats["skipped"] += 1
+                        return None
+                    logger.warning("Crawl fetch failed for %s: %s", ticker, e)
+                    self.stats["failed"] += 1
+                    return None
+                except Exception as e:
+                    logger.warning("Crawl fetch failed for %s: %s", ticker, e)
+                    self.stats["failed"] += 1
+                    return None
+            else:
+                self.stats["failed"] += 1
+                return None
+        # The crawl only refreshes profile and trade data; keep whatever news is already stored
+        news_data = cached.news_data if cached else []
+        self.stats["fetched"] += 1
+        return TickerData(profile_data, trade_data, news_data)
+
+    async def _flush(self):
+        for flush in self.flushers:
+            try:
+                await flush()
+            except Exception as e:
+                logger.error("Crawl flush failed: %s", e)
+        await self.cache.flush()
+        if not self.cache.writable:
+            # Stop before the checkpoint moves on; run() retries this batch later
+            raise RuntimeError("persistent ticker cache is not accepting writes")
+
+    async def crawl(self, state):
+        """Run (or resume) one pass, checkpointing after every batch"""
+        order = state["order"]
+        logger.info("Crawl pass resuming at %s of %s tickers", state["position"], len(order))
+        started = time.monotonic()
+        while state["position"] < len(order):
+            batch = order[state["position"]:state["position"] + self.batch_size]
+            results = await asyncio.gather(*(self._fetch(ticker) for ticker in batch))
+            for ticker, instance in zip(batch, results):
+                if instance is not None:
+                    # Listeners queue the persistent cache and snapshot writes and update the
+                    # in-memory indexes; the instances themselves are not kept in memory
+                    TickerData.notify(ticker, instance)
+            await self._flush()
+            state["position"] += len(batch)
+            await asyncio.to_thread(self.save_checkpoint, state)
+
+        state["completed_at"] = time.time()
+        await asyncio.to_thread(self.save_checkpoint, state)
+        logger.info(
+            "Crawl pass finished in %.0f min: %s fetched, %s skipped, %s failed",
+            (time.monotonic() - started) / 60, self.stats["fetched"], self.stats["skipped"], self.stats["failed"],
+        )
+
+    @staticmethod
+    def _seconds_until_next_run(now=None):
+        now = now or datetime.now(timezone.utc)
+        next_run = now.replace(hour=Config.CRAWL_HOUR_UTC, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    async def run(self):
+        if not self.cache.writable:
+            logger.info("Persistent ticker cache unavailable, universe crawl disabled")
+            return
+        await run_as_leader("universe_crawler", self._crawl_forever)
+
+    async def _crawl_forever(self):
+        while not symbol_directory.is_loaded:
+            await asyncio.sleep(60)
+
+        state = await asyncio.to_thread(self.load_checkpoint)
+        while True:
+            if state is None or state.get("completed_at") is not None:
+                if state is not None:
+                    await asyncio.sleep(self._seconds_until_next_run())
+                # No checkpoint at all means a first deployment: crawl right away
+                state = await self._new_pass()
+                self.stats = {"fetched": 0, "skipped": 0, "failed": 0}
+            try:
+                await self.crawl(state)
+            except Exception as e:
+                logger.error("Crawl pass failed at %s: %s", state["position"], e)
+                await asyncio.sleep(300)